@@ -1,3 +1,4 @@
+import functools
 import warnings
 
 import numpy as np
@@ -6,6 +7,7 @@ from scipy.optimize import curve_fit, basinhopping
 from impedance.models.circuits.elements import circuit_elements
 from impedance.models.circuits.elements import get_element_from_name
 from impedance.models.circuits.fitting import check_and_eval, rmse
+from .nleis_elements_pair import clear_tlm_cache
 
 import networkx as nx
 import re
@@ -283,6 +285,9 @@ def circuit_fit(frequencies, impedances, circuit, initial_guess, constants={},
     f = np.array(frequencies, dtype=float)
     Z = np.array(impedances, dtype=complex)
 
+    # start each fit from an empty transmission line model cache
+    clear_tlm_cache()
+
     # set upper and lower bounds on a per-element basis
     if bounds is None:
         bounds = set_default_bounds(circuit, constants=constants)
@@ -402,10 +407,7 @@ def wrapCircuit(circuit, constants):
 
         """
 
-        x = eval(buildCircuit(circuit, frequencies, *parameters,
-                              constants=constants, eval_string='',
-                              index=0)[0],
-                 circuit_elements)
+        x = evalCircuit(circuit, frequencies, parameters, constants)
         y_real = np.real(x)
         y_imag = np.imag(x)
 
@@ -547,6 +549,83 @@ def buildCircuit(circuit, frequencies, *parameters,
 
     return eval_string, index
 
+
+class _Name:
+    """ placeholder that buildCircuit prints as a variable name """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_circuit(circuit, constants, n_params):
+    """ compiles the eval string of a circuit once, with the parameters
+    and frequencies left as the names _p and _f (p, s and d are taken by
+    the circuit combinators)
+
+    Parameters
+    ----------
+    circuit : str
+    constants : tuple of (str, float)
+        The items of the constants dictionary
+    n_params : int
+        Number of parameters passed to the circuit
+
+    Returns
+    -------
+    code : code object
+        Evaluated with _p and _f bound in its namespace
+
+    """
+
+    parameters = [_Name('_p[{}]'.format(i)) for i in range(n_params)]
+    eval_string = buildCircuit(circuit, _Name('_f'), *parameters,
+                               constants=dict(constants), eval_string='',
+                               index=0)[0]
+    return compile(eval_string, '<circuit>', 'eval')
+
+
+def evalCircuit(circuit, frequencies, parameters, constants, graph=False):
+    """ evaluates a circuit string, compiling the eval string or building
+    the execution graph only once per circuit and constants
+
+    Parameters
+    ----------
+    circuit : str
+    frequencies : list/tuple/array of floats
+    parameters : list/tuple/array of floats
+    constants : dict
+    graph : bool, optional
+        Whether to use execution graph to process the circuit.
+        Defaults to False, which uses eval based code
+
+    Returns
+    -------
+    numpy.ndarray of dtype complex128
+
+    """
+
+    if graph:
+        cg = _cached(_circuit_graph, circuit, tuple(constants.items()))
+        return cg.compute(frequencies, *parameters)
+    code = _cached(_compile_circuit, circuit, tuple(constants.items()),
+                   len(parameters))
+    return eval(code, circuit_elements,
+                {'_p': parameters, '_f': frequencies})
+
+
+def _cached(func, *args):
+    """ calls a functools.lru_cache function, bypassing the cache
+    when the arguments cannot be hashed (e.g. list valued constants) """
+    try:
+        hash(args)
+    except TypeError:
+        return func.__wrapped__(*args)
+    return func(*args)
+
 # adopt from impedance.py to support 2nd-NLEIS/NLEIS fitting
 
 
@@ -631,6 +710,19 @@ class CircuitGraph:
         self.parse_circuit()
         # compute the execution order of the graph
         self.execution_order = list(nx.topological_sort(self.graph))
+        # resolve the function, inputs and parameter names of each node once
+        # so that compute does not go back through the graph on every call
+        self._node_program = []
+        for node in self.execution_order:
+            Zfunc = self.graph.nodes[node]["Z"]
+            preds = list(self.graph.predecessors(node))
+            if len(preds) < 1:
+                n_params = Zfunc.num_params
+                p_names = [format_parameter_name(node, j, n_params)
+                           for j in range(n_params)]
+            else:
+                p_names = None
+            self._node_program.append((node, Zfunc, preds, p_names))
         # initialize the constants dictionary
         self.constants = constants if constants is not None else dict()
 
@@ -724,16 +816,10 @@ class CircuitGraph:
         '''
         node_results = {}
         pindex = 0
-        for node in self.execution_order:
-            Zfunc = self.graph.nodes[node]["Z"]
-            plist = [
-                node_results[pred] for pred in self.graph.predecessors(node)
-            ]
-
-            if len(plist) < 1:
-                n_params = Zfunc.num_params
-                for j in range(n_params):
-                    p_name = format_parameter_name(node, j, n_params)
+        for node, Zfunc, preds, p_names in self._node_program:
+            if p_names is not None:
+                plist = []
+                for p_name in p_names:
                     if p_name in self.constants:
                         plist.append(self.constants[p_name])
                     else:
@@ -741,7 +827,8 @@ class CircuitGraph:
                         pindex += 1
                 node_results[node] = Zfunc(plist, f)
             else:
-                node_results[node] = Zfunc(plist)
+                node_results[node] = Zfunc(
+                    [node_results[pred] for pred in preds])
 
         return np.squeeze(node_results[node])
 
@@ -785,6 +872,13 @@ class CircuitGraph:
         return np.sum(n_params)
 
 
+@functools.lru_cache(maxsize=64)
+def _circuit_graph(circuit, constants):
+    """ builds the execution graph of a circuit once per circuit
+    and constants, given as the items of the constants dictionary """
+    return CircuitGraph(circuit, dict(constants))
+
+
 def format_parameter_name(name, j, n_params):
     '''
     Format the parameter name for the given element.
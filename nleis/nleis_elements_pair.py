@@ -1,3 +1,5 @@
+import functools
+
 import numpy as np
 from scipy.special import iv
 from scipy import constants
@@ -7,6 +9,8 @@ from impedance.models.circuits.elements import circuit_elements, \
 F = constants.physical_constants['Faraday constant'][0]
 R = constants.R
 T = 298.15
+# F/RT, used by every 2nd-NLEIS element
+_F_RT = F / (R * T)
 
 # element function adopted from impedance.py for better documentation
 
@@ -29,8 +33,11 @@ def element(num_params, units, overwrite=False):
     """
 
     def decorator(func):
+        # resolved once here rather than on every evaluation
+        name = func.__name__
+
         def wrapper(p, f):
-            typeChecker(p, f, func.__name__, num_params)
+            typeChecker(p, f, name, num_params)
             return func(p, f)
 
         wrapper.num_params = num_params
@@ -78,9 +85,7 @@ def d(difference):
 
     '''
 
-    z = len(difference[0])*[0 + 0*1j]
-    z += difference[0]
-    z += -difference[-1]
+    z = np.asarray(difference[0]) - np.asarray(difference[-1])
     return z
 
 
@@ -88,6 +93,26 @@ def d(difference):
 circuit_elements['d'] = d
 
 
+def _omega(f, *, _2pi=2 * np.pi, _asarray=np.asarray):
+    """
+    Angular frequency shared by all circuit elements
+
+    Parameters
+    ----------
+    f : list or np.ndarray of float
+        Frequencies in Hz
+
+    Returns
+    -------
+    ω : np.ndarray of float
+        Angular frequencies in rad/s
+
+    """
+    # the numpy callables of the shared helpers are bound as keyword
+    # defaults so the fit loop reads them as locals
+    return _2pi * _asarray(f, dtype=np.float64)
+
+
 @element(num_params=2, units=['Ohm', 'F'])
 def RC(p, f):
     """
@@ -116,7 +141,7 @@ def RC(p, f):
         p[1] = C_{dl}; \\;
 
     """
-    ω = 2*np.pi * np.array(f)
+    ω = _omega(f)
     Rct, Cdl = p[0], p[1]
 
     ω_star = ω*Rct*Cdl
@@ -161,12 +186,14 @@ def RCn(p, f):
     <https://doi.org/10.1149/1945-7111/ad15ca>`_.
 
     '''
-    ω = 2*np.pi * np.array(f)
+    ω = _omega(f)
     Rct, Cdl, ε = p[0], p[1], p[2]
 
     ω_star = ω*Rct*Cdl
+    ω_star_sq = ω_star*ω_star
 
-    return -ε*F/(R*T)*Rct**2 / (1 + 4*ω_star*1j - 5*ω_star**2 - 2*ω_star**3*1j)
+    return -ε*_F_RT*Rct**2 / (1 + 4j*ω_star - 5*ω_star_sq
+                              - 2j*ω_star_sq*ω_star)
 
 
 @element(num_params=4, units=['Ohms', 'F', 'Ohms', 's'])
@@ -213,7 +240,7 @@ def RCD(p, f):
     <https://doi.org/10.1149/1945-7111/ad15ca>`_.
 
     '''
-    ω = 2*np.pi * np.array(f)
+    ω = _omega(f)
     Rct, Cdl, Aw, τd = p[0], p[1], p[2], p[3]
 
     sqrt_1j_ω_τd = np.sqrt(1j*ω*τd)
@@ -287,14 +314,14 @@ def RCDn(p, f):
 
     '''
 
-    ω = 2 * np.pi * np.array(f)
+    ω = _omega(f)
     Rct, Cdl, Aw, τd, κ, ε = p[0], p[1], p[2], p[3], p[4], p[5]
 
     sqrt_1j_ω_τd = np.sqrt(1j * ω * τd)
     tanh_1j_ω_τd = np.tanh(sqrt_1j_ω_τd)
     Zd1 = Aw / (sqrt_1j_ω_τd * tanh_1j_ω_τd)
 
-    sqrt_1j_2ω_τd = np.sqrt(1j * 2 * ω * τd)
+    sqrt_1j_2ω_τd = np.sqrt(2) * sqrt_1j_ω_τd
     tanh_1j_2ω_τd = np.tanh(sqrt_1j_2ω_τd)
     Zd2 = Aw / (sqrt_1j_2ω_τd * tanh_1j_2ω_τd)
 
@@ -303,13 +330,51 @@ def RCDn(p, f):
     y2 = Zd1 / (Zd1 + Rct)
 
     Z1 = Rct / (y1 + 1j * ω_star)
-    const = ((Rct * κ * y2**2) - Rct * ε * F / (R * T) * y1**2) / (Zd2 + Rct)
+    const = ((Rct * κ * y2*y2) - Rct * ε * _F_RT * y1*y1) / (Zd2 + Rct)
 
-    Z2 = (const * Z1**2) / (2 * ω_star * 1j + Rct / (Zd2 + Rct))
+    Z2 = (const * Z1*Z1) / (2 * ω_star * 1j + Rct / (Zd2 + Rct))
 
     return Z2
 
 
+# x - tanh(x) = x^3 (1/3 - 2 x^2/15 + 17 x^4/315 - ...)
+_X_MINUS_TANH_SERIES = (1 / 3, 2 / 15, 17 / 315, 62 / 2835, 1382 / 155925,
+                        21844 / 6081075, 929569 / 638512875,
+                        6404582 / 10854718875)
+
+
+def _spherical_Zd(Aw, x):
+    """
+    Spherical diffusion impedance :math:`A_w \\tanh(x) / (x - \\tanh(x))`
+
+    Parameters
+    ----------
+    Aw : float
+        Warburg coefficient
+    x : np.ndarray of dtype complex128
+        :math:`\\sqrt{j\\omega\\tau}`
+
+    Returns
+    -------
+    Zd : np.ndarray of dtype complex128
+        The diffusion impedance
+
+    Notes
+    -----
+    :math:`x - \\tanh(x)` cancels to :math:`x^3/3` at low frequency, so it is
+    taken from its Taylor series for :math:`|x| < 0.1`.
+
+    """
+
+    tanh_x = np.tanh(x)
+    x_sq = x * x
+    series = _X_MINUS_TANH_SERIES[-1]
+    for c in _X_MINUS_TANH_SERIES[-2::-1]:
+        series = c - x_sq * series
+    x_minus_tanh = np.where(np.abs(x) < 0.1, x * x_sq * series, x - tanh_x)
+    return Aw * tanh_x / x_minus_tanh
+
+
 @element(num_params=4, units=['Ohms', 'F', 'Ohms', 's'])
 def RCS(p, f):
     '''
@@ -356,12 +421,11 @@ def RCS(p, f):
     <https://doi.org/10.1149/1945-7111/ad15ca>`_.
 
     '''
-    ω = 2 * np.pi * np.array(f)
+    ω = _omega(f)
     Rct, Cdl, Aw, τd = p[0], p[1], p[2], p[3]
 
     sqrt_1j_ω_τd = np.sqrt(1j * ω * τd)
-    tanh_1j_ω_τd = np.tanh(sqrt_1j_ω_τd)
-    Zd = Aw*tanh_1j_ω_τd / (sqrt_1j_ω_τd - tanh_1j_ω_τd)
+    Zd = _spherical_Zd(Aw, sqrt_1j_ω_τd)
 
     ω_star = ω * Rct * Cdl
     Z = Rct / (Rct / (Rct + Zd) + 1j * ω_star)
@@ -433,29 +497,76 @@ def RCSn(p, f):
 
     '''
 
-    ω = 2 * np.pi * np.array(f)
+    ω = _omega(f)
     Rct, Cdl, Aw, τd, κ, ε = p[0], p[1], p[2], p[3], p[4], p[5]
 
     sqrt_1j_ω_τd = np.sqrt(1j * ω * τd)
-    tanh_1j_ω_τd = np.tanh(sqrt_1j_ω_τd)
-    Zd1 = Aw * tanh_1j_ω_τd / (sqrt_1j_ω_τd - tanh_1j_ω_τd)
+    sqrt_1j_2ω_τd = np.sqrt(2) * sqrt_1j_ω_τd
 
-    sqrt_1j_2ω_τd = np.sqrt(1j * 2 * ω * τd)
-    tanh_1j_2ω_τd = np.tanh(sqrt_1j_2ω_τd)
-    Zd2 = Aw * tanh_1j_2ω_τd / (sqrt_1j_2ω_τd - tanh_1j_2ω_τd)
+    # ω and 2ω evaluated together
+    Zd1, Zd2 = _spherical_Zd(Aw, np.stack([sqrt_1j_ω_τd, sqrt_1j_2ω_τd]))
 
     ω_star = ω * Rct * Cdl
     y1 = Rct / (Zd1 + Rct)
     y2 = Zd1 / (Zd1 + Rct)
 
     Z1 = Rct / (y1 + 1j * ω_star)
-    const = ((Rct * κ * y2**2) - Rct * ε * F / (R * T) * y1**2) / (Zd2 + Rct)
+    const = ((Rct * κ * y2*y2) - Rct * ε * _F_RT * y1*y1) / (Zd2 + Rct)
 
-    Z2 = (const * Z1**2) / (2 * ω_star * 1j + Rct / (Zd2 + Rct))
+    Z2 = (const * Z1*Z1) / (2 * ω_star * 1j + Rct / (Zd2 + Rct))
 
     return Z2
 
 
+def _porous_Z2(b1, b2, Rpore, Rct, const, *, _exp=np.exp,
+               _expm1=np.expm1, _tanh=np.tanh):
+    """
+    Second harmonic response shared by the porous electrode models
+
+    Parameters
+    ----------
+    b1 : np.ndarray of dtype complex128
+        β1 evaluated at ω
+    b2 : np.ndarray of dtype complex128
+        β2 evaluated at 2ω
+    Rpore : float
+        Pore electrolyte resistance
+    Rct : float
+        Charge transfer resistance
+    const : float or np.ndarray
+        Nonlinear driving term of the pore wall reaction,
+        εf for TPn and the diffusion-corrected term otherwise
+
+    Returns
+    -------
+    Z : np.ndarray of dtype complex128
+        The 2nd-NLEIS impedance
+
+    Notes
+    -----
+    The hyperbolic terms only enter through
+    :math:`\\sinh(2\\beta_1)/\\sinh^2(\\beta_1) = 2\\coth(\\beta_1)` and
+    :math:`\\cosh(2\\beta_1)/\\sinh^2(\\beta_1) = \\coth^2(\\beta_1) + 1`,
+    which are evaluated from :math:`e^{-2\\beta_1}` so that they never
+    overflow for large :math:`\\text{Re}(\\beta_1)`.
+
+    """
+
+    # Re(β1) > 0, so e^{-2β1} underflows to 0 instead of overflowing
+    e = _exp(-2 * b1)
+    em = -_expm1(-2 * b1)
+    coth1 = (1 + e) / em
+    csch1_sq = 4 * e / (em * em)
+
+    b2_sq = b2 * b2
+    b_diff = b2_sq - 4 * b1 * b1
+
+    mf = ((Rpore**3) * const / Rct) / (b1 * b1)
+    part1 = (b1 / b2) * 2 * coth1 / (b_diff * _tanh(b2))
+    part2 = -(coth1 * coth1 + 1) / (2 * b_diff) - csch1_sq / (2 * b2_sq)
+    return mf * (part1 + part2)
+
+
 @element(num_params=3, units=['Ohms', 'Ohms', 'F'])
 def TP(p, f):
     '''
@@ -494,7 +605,7 @@ def TP(p, f):
 
     '''
 
-    ω = 2 * np.pi * np.array(f)
+    ω = _omega(f)
     Rpore, Rct, Cdl = p[0], p[1], p[2]
 
     beta = np.sqrt(1j * ω * Rpore * Cdl + Rpore / Rct)
@@ -554,19 +665,13 @@ def TPn(p, f):
 
     """
 
-    ω = 2 * np.pi * np.array(f)
+    ω = _omega(f)
     Rpore, Rct, Cdl, ε = p[0], p[1], p[2], p[3]
-    b1 = np.sqrt(1j * ω * Rpore * Cdl + Rpore / Rct)
-    b2 = np.sqrt(1j * 2 * ω * Rpore * Cdl + Rpore / Rct)
+    jω_Rpore_Cdl = 1j * ω * Rpore * Cdl
+    b1 = np.sqrt(jω_Rpore_Cdl + Rpore / Rct)
+    b2 = np.sqrt(2 * jω_Rpore_Cdl + Rpore / Rct)
 
-    sinh1 = np.where(b1 < 100, np.sinh(b1), 1e10)
-    sinh2 = np.where(b1 < 100, np.sinh(2 * b1), 1e10)
-    cosh2 = np.where(b1 < 100, np.cosh(2 * b1), 1e10)
-
-    mf = ((Rpore ** 3) / Rct) * ε * (F / (R * T)) / ((b1 * sinh1) ** 2)
-    part1 = (b1 / b2) * sinh2 / ((b2 ** 2 - 4 * b1 ** 2) * np.tanh(b2))
-    part2 = -cosh2 / (2 * (b2 ** 2 - 4 * b1 ** 2)) - 1 / (2 * b2 ** 2)
-    Z = mf * (part1 + part2)
+    Z = _porous_Z2(b1, b2, Rpore, Rct, ε * _F_RT)
 
     return Z
 
@@ -620,7 +725,7 @@ def TDP(p, f):
     <https://doi.org/10.1149/1945-7111/ad15ca>`_.
 
     """
-    ω = 2 * np.pi * np.array(f)
+    ω = _omega(f)
     Rpore, Rct, Cdl, Aw, τd = p[0], p[1], p[2], p[3], p[4]
 
     sqrt_1j_ω_τd = np.sqrt(1j * ω * τd)
@@ -706,12 +811,12 @@ def TDPn(p, f):
 
     """
 
-    ω = 2 * np.pi * np.array(f)
+    ω = _omega(f)
 
     Rpore, Rct, Cdl, Aw, τd, κ, ε = p[0], p[1], p[2], p[3], p[4], p[5], p[6]
 
     sqrt_1j_ω_τd = np.sqrt(1j * ω * τd)
-    sqrt_1j_2ω_τd = np.sqrt(1j * 2 * ω * τd)
+    sqrt_1j_2ω_τd = np.sqrt(2) * sqrt_1j_ω_τd
 
     Zd1 = Aw / (sqrt_1j_ω_τd * np.tanh(sqrt_1j_ω_τd))
     Zd2 = Aw / (sqrt_1j_2ω_τd * np.tanh(sqrt_1j_2ω_τd))
@@ -719,18 +824,12 @@ def TDPn(p, f):
     y1 = Rct / (Zd1 + Rct)
     y2 = Zd1 / (Zd1 + Rct)
 
-    b1 = np.sqrt(1j * ω * Rpore * Cdl + Rpore / (Zd1 + Rct))
-    b2 = np.sqrt(1j * 2 * ω * Rpore * Cdl + Rpore / (Zd2 + Rct))
-
-    sinh1 = np.where(np.abs(b1) < 100, np.sinh(b1), 1e10)
-    sinh2 = np.where(np.abs(b1) < 100, np.sinh(2 * b1), 1e10)
-    cosh2 = np.where(np.abs(b1) < 100, np.cosh(2 * b1), 1e10)
+    jω_Rpore_Cdl = 1j * ω * Rpore * Cdl
+    b1 = np.sqrt(jω_Rpore_Cdl + Rpore / (Zd1 + Rct))
+    b2 = np.sqrt(2 * jω_Rpore_Cdl + Rpore / (Zd2 + Rct))
 
-    const = -((Rct * κ * y2**2) - Rct * ε * (F / (R * T)) * y1**2)/(Zd2+Rct)
-    mf = ((Rpore**3) * const / Rct) / ((b1 * sinh1)**2)
-    part1 = (b1 / b2) * sinh2 / ((b2**2 - 4 * b1**2) * np.tanh(b2))
-    part2 = -cosh2 / (2 * (b2**2 - 4 * b1**2)) - 1 / (2 * b2**2)
-    Z = mf * (part1 + part2)
+    const = -((Rct * κ * y2*y2) - Rct * ε * _F_RT * y1*y1)/(Zd2+Rct)
+    Z = _porous_Z2(b1, b2, Rpore, Rct, const)
 
     return Z
 
@@ -785,12 +884,11 @@ def TDS(p, f):
 
 
     """
-    ω = 2 * np.pi * np.array(f)
+    ω = _omega(f)
     Rpore, Rct, Cdl, Aw, τd = p[0], p[1], p[2], p[3], p[4]
 
     sqrt_1j_ω_τd = np.sqrt(1j * ω * τd)
-    tanh_1j_ω_τd = np.tanh(sqrt_1j_ω_τd)
-    Zd = Aw * tanh_1j_ω_τd / (sqrt_1j_ω_τd - tanh_1j_ω_τd)
+    Zd = _spherical_Zd(Aw, sqrt_1j_ω_τd)
 
     beta = np.sqrt(1j * ω * Rpore * Cdl + Rpore / (Zd + Rct))
 
@@ -873,36 +971,53 @@ def TDSn(p, f):
 
     """
 
-    ω = 2 * np.pi * np.array(f)
+    ω = _omega(f)
     Rpore, Rct, Cdl, Aw, τd, κ, ε = p[0], p[1], p[2], p[3], p[4], p[5], p[6]
 
     sqrt_1j_ω_τd = np.sqrt(1j * ω * τd)
-    sqrt_1j_2ω_τd = np.sqrt(1j * 2 * ω * τd)
-    tanh_1j_ω_τd = np.tanh(sqrt_1j_ω_τd)
-    tanh_1j_2ω_τd = np.tanh(sqrt_1j_2ω_τd)
+    sqrt_1j_2ω_τd = np.sqrt(2) * sqrt_1j_ω_τd
 
-    Zd1 = Aw * tanh_1j_ω_τd / (sqrt_1j_ω_τd - tanh_1j_ω_τd)
-    Zd2 = Aw * tanh_1j_2ω_τd / (sqrt_1j_2ω_τd - tanh_1j_2ω_τd)
+    # ω and 2ω evaluated together
+    Zd1, Zd2 = _spherical_Zd(Aw, np.stack([sqrt_1j_ω_τd, sqrt_1j_2ω_τd]))
 
     y1 = Rct / (Zd1 + Rct)
     y2 = Zd1 / (Zd1 + Rct)
 
-    b1 = np.sqrt(1j * ω * Rpore * Cdl + Rpore / (Zd1 + Rct))
-    b2 = np.sqrt(1j * 2 * ω * Rpore * Cdl + Rpore / (Zd2 + Rct))
+    jω_Rpore_Cdl = 1j * ω * Rpore * Cdl
+    b1 = np.sqrt(jω_Rpore_Cdl + Rpore / (Zd1 + Rct))
+    b2 = np.sqrt(2 * jω_Rpore_Cdl + Rpore / (Zd2 + Rct))
 
-    sinh1 = np.where(b1 < 100, np.sinh(b1), 1e10)
-    sinh2 = np.where(b1 < 100, np.sinh(2 * b1), 1e10)
-    cosh2 = np.where(b1 < 100, np.cosh(2 * b1), 1e10)
-
-    const = -((Rct * κ * y2**2) - Rct * ε * (F / (R * T)) * y1**2)/(Zd2+Rct)
-    mf = ((Rpore**3) * const / Rct) / ((b1 * sinh1)**2)
-    part1 = (b1 / b2) * sinh2 / ((b2**2 - 4 * b1**2) * np.tanh(b2))
-    part2 = -cosh2 / (2 * (b2**2 - 4 * b1**2)) - 1 / (2 * b2**2)
-    Z = mf * (part1 + part2)
+    const = -((Rct * κ * y2*y2) - Rct * ε * _F_RT * y1*y1)/(Zd2+Rct)
+    Z = _porous_Z2(b1, b2, Rpore, Rct, const)
 
     return Z
 
 
+def _bessel_ratio(x, *, _iv=iv, _where=np.where):
+    """
+    Ratio of modified Bessel functions I0(x)/I1(x) for the
+    cylindrical diffusion elements
+
+    Parameters
+    ----------
+    x : np.ndarray of dtype complex128
+        Argument of the Bessel functions, any shape
+
+    Returns
+    -------
+    ratio : np.ndarray of dtype complex128
+        I0(x)/I1(x), saturated to 1 where Re(x) >= 100
+
+    """
+
+    # iv grows as exp(Re(x)); the saturated entries are never passed to iv
+    mask = x.real < 100
+    x_safe = _where(mask, x, 1)
+    # both orders in one broadcast call to iv
+    i0, i1 = _iv(np.array([0, 1]).reshape((2,) + (1,) * np.ndim(x)), x_safe)
+    return _where(mask, i0 / i1, 1)
+
+
 @element(num_params=5, units=['Ohms', 'Ohms', 'F', 'Ohms', 's'])
 def TDC(p, f):
     """
@@ -949,18 +1064,12 @@ def TDC(p, f):
     <https://doi.org/10.1149/1945-7111/ad15ca>`_.
 
     """
-    ω = 2 * np.pi * np.array(f)
+    ω = _omega(f)
     Rpore, Rct, Cdl, Aw, τd = p[0], p[1], p[2], p[3], p[4]
 
     sqrt_1j_ω_τd = np.sqrt(1j * ω * τd)
 
-    i01 = iv(0, sqrt_1j_ω_τd)
-    i11 = iv(1, sqrt_1j_ω_τd)
-
-    i01 = np.where(sqrt_1j_ω_τd < 100, i01, 1e20)
-    i11 = np.where(sqrt_1j_ω_τd < 100, i11, 1e20)
-
-    Zd = Aw * i01 / (sqrt_1j_ω_τd * i11)
+    Zd = Aw * _bessel_ratio(sqrt_1j_ω_τd) / sqrt_1j_ω_τd
 
     beta = np.sqrt(1j * ω * Rpore * Cdl + Rpore / (Zd + Rct))
     Z = Rpore / (beta * np.tanh(beta))
@@ -1039,35 +1148,25 @@ def TDCn(p, f):
 
     """
 
-    ω = 2 * np.pi * np.array(f)
+    ω = _omega(f)
     Rpore, Rct, Cdl, Aw, τd, κ, ε = p[0], p[1], p[2], p[3], p[4], p[5], p[6]
 
     sqrt_1j_ω_τd = np.sqrt(1j * ω * τd)
-    sqrt_1j_2ω_τd = np.sqrt(1j * 2 * ω * τd)
+    sqrt_1j_2ω_τd = np.sqrt(2) * sqrt_1j_ω_τd
 
-    i01 = np.where(sqrt_1j_ω_τd < 100, iv(0, sqrt_1j_ω_τd), 1e20)
-    i11 = np.where(sqrt_1j_ω_τd < 100, iv(1, sqrt_1j_ω_τd), 1e20)
-    i02 = np.where(sqrt_1j_2ω_τd < 100, iv(0, sqrt_1j_2ω_τd), 1e20)
-    i12 = np.where(sqrt_1j_2ω_τd < 100, iv(1, sqrt_1j_2ω_τd), 1e20)
-
-    Zd1 = Aw * i01 / (sqrt_1j_ω_τd * i11)
-    Zd2 = Aw * i02 / (sqrt_1j_2ω_τd * i12)
+    # ω and 2ω evaluated together
+    sqrt_1j_ω_τd_both = np.stack([sqrt_1j_ω_τd, sqrt_1j_2ω_τd])
+    Zd1, Zd2 = Aw * _bessel_ratio(sqrt_1j_ω_τd_both) / sqrt_1j_ω_τd_both
 
     y1 = Rct / (Zd1 + Rct)
     y2 = Zd1 / (Zd1 + Rct)
 
-    b1 = np.sqrt(1j * ω * Rpore * Cdl + Rpore / (Zd1 + Rct))
-    b2 = np.sqrt(1j * 2 * ω * Rpore * Cdl + Rpore / (Zd2 + Rct))
-
-    sinh1 = np.where(b1 < 100, np.sinh(b1), 1e10)
-    sinh2 = np.where(b1 < 100, np.sinh(2 * b1), 1e10)
-    cosh2 = np.where(b1 < 100, np.cosh(2 * b1), 1e10)
+    jω_Rpore_Cdl = 1j * ω * Rpore * Cdl
+    b1 = np.sqrt(jω_Rpore_Cdl + Rpore / (Zd1 + Rct))
+    b2 = np.sqrt(2 * jω_Rpore_Cdl + Rpore / (Zd2 + Rct))
 
-    const = -((Rct * κ * y2**2) - Rct * ε * (F / (R * T)) * y1**2) / (Zd2+Rct)
-    mf = ((Rpore**3) * const / Rct) / ((b1 * sinh1)**2)
-    part1 = (b1 / b2) * sinh2 / ((b2**2 - 4 * b1**2) * np.tanh(b2))
-    part2 = -cosh2 / (2 * (b2**2 - 4 * b1**2)) - 1 / (2 * b2**2)
-    Z = mf * (part1 + part2)
+    const = -((Rct * κ * y2*y2) - Rct * ε * _F_RT * y1*y1) / (Zd2+Rct)
+    Z = _porous_Z2(b1, b2, Rpore, Rct, const)
 
     return Z
 
@@ -1076,6 +1175,42 @@ def TDCn(p, f):
 ##################################################################
 
 
+@functools.lru_cache(maxsize=None)
+def _A_patterns_TLMn(N):
+    """
+    Frequency- and parameter-independent parts of the TLMn matrix `Ax`,
+    computed once per N
+
+    Parameters
+    ----------
+    N : int
+        Number of circuit elements
+
+    Returns
+    -------
+    A_count : np.ndarray
+        Number of Rpore terms, N - 1 - i - j above the anti-diagonal
+    A_last : np.ndarray
+        Ones in the last row
+    A_Z12t : np.ndarray
+        +1 in the first column and -1 on the anti-diagonal
+        of the first N - 1 rows
+
+    """
+
+    i, j = np.indices((N, N))
+    A_count = np.where(i + j < N - 1, N - 1 - i - j, 0).astype(np.float64)
+    A_last = np.zeros((N, N))
+    A_last[-1, :] = 1
+    A_Z12t = np.zeros((N, N))
+    A_Z12t[:-1, 0] = 1
+    A_Z12t[i[:-1, 0], N - 1 - i[:-1, 0]] -= 1
+    # the arrays are shared between calls
+    for A in (A_count, A_last, A_Z12t):
+        A.setflags(write=False)
+    return A_count, A_last, A_Z12t
+
+
 def A_matrices_TLMn(N, Rpore, Z12t):
     """
     Construct the matrix `Ax` for the TLMn model
@@ -1086,31 +1221,320 @@ def A_matrices_TLMn(N, Rpore, Z12t):
         Number of circuit elements
     Rpore : float
         Pore electrolyte resistance
-    Z12t : np.complex128
-        The single element impedance at 2ω
+    Z12t : np.complex128 or np.ndarray of dtype complex128
+        The single element impedance at 2ω, either at one frequency
+        or at every frequency
 
     Returns
     -------
     Ax : np.ndarray
-        The matrix `Ax` for the TLMn model
+        The matrix `Ax` for the TLMn model, of shape (N, N) for a single
+        Z12t or stacked to (len(Z12t), N, N)
 
     """
 
-    Ax = np.zeros((N, N), dtype=np.complex128)
-    # Construct matrix `A`
-    for i in range(N - 1):
-        for j in range(N - 1 - i):
-            # construct the Rpore term
-            Ax[i, j] = (N - 1 - i - j) * Rpore
-        # construct the Rpore Z12t term
-        Ax[i, 0] += Z12t
-        Ax[i, N - 1 - i] -= Z12t
-    # construct the last row of the matrix
-    Ax[-1, :] = 1
+    A_count, A_last, A_Z12t = _A_patterns_TLMn(N)
+    Z12t = np.asarray(Z12t, dtype=np.complex128)
+    # the stacked matrices are allocated once and the (N, N)
+    # parameter-only part is added in place
+    Ax = np.multiply(Z12t[..., None, None], A_Z12t)
+    Ax += A_count * Rpore + A_last
     return (Ax)
 
 
+def _solve_TLMn(I1, Z2, Z12t, Rpore, N):
+    """
+    Solve the 2nd-NLEIS current distribution of the TLMn models
+    at all frequencies at once
+
+    Parameters
+    ----------
+    I1 : np.ndarray of dtype complex128
+        The 1st harmonic current fraction, of shape (len(f), N)
+    Z2 : np.ndarray of dtype complex128
+        The single element 2nd-NLEIS impedance
+    Z12t : np.ndarray of dtype complex128
+        The single element impedance at 2ω
+    Rpore : float
+        Pore electrolyte resistance
+    N : int
+        Number of circuit elements
+
+    Returns
+    -------
+    I2 : np.ndarray of dtype complex128
+        The 2nd harmonic current, of shape (len(f), N),
+        ordered from the N-th to the first element
+
+    """
+
+    Ax = A_matrices_TLMn(N, Rpore, Z12t)
+    # b[i] = I1[-1]**2 - I1[i]**2, zero for the last row
+    I1_sq = I1 * I1
+    b = I1_sq[:, -1:] - I1_sq
+    I2 = np.linalg.solve(Ax, (-b * Z2[:, None])[..., None])[..., 0]
+    return I2
+
+
+def _TLMn_N2(Z1, Z2, Z12t, Rpore):
+    """
+    Closed form 2nd-NLEIS impedance of the TLMn models for N = 2
+
+    Parameters
+    ----------
+    Z1 : np.ndarray of dtype complex128
+        The single element impedance
+    Z2 : np.ndarray of dtype complex128
+        The single element 2nd-NLEIS impedance
+    Z12t : np.ndarray of dtype complex128
+        The single element impedance at 2ω
+    Rpore : float
+        Pore electrolyte resistance
+
+    Returns
+    -------
+    Z : np.ndarray of dtype complex128
+        The 2nd-NLEIS impedance
+
+    """
+
+    d1 = 2 * Z1 + Rpore
+    sum1 = Z1 * Z1 / (d1 * d1)
+    sum2 = (Z12t * Rpore + Rpore * Rpore) / ((2 * Z12t + Rpore) * d1)
+    return (sum1 + sum2) * Z2
+
+
+@functools.lru_cache(maxsize=None)
+def _A_patterns_mTi(N):
+    """
+    Frequency- and parameter-independent parts of the mTi matrix `Ax`,
+    computed once per N
+
+    Parameters
+    ----------
+    N : int
+        Number of circuit elements
+
+    Returns
+    -------
+    A_count : np.ndarray
+        Number of Rpore terms, -(i - j) below the diagonal
+        plus (i + 1) on every row
+    A_diag : np.ndarray
+        The identity matrix
+
+    """
+
+    i, j = np.indices((N, N))
+    A_count = (np.where(j < i, j - i, 0) + i + 1).astype(np.float64)
+    A_diag = np.eye(N)
+    # the arrays are shared between calls
+    for A in (A_count, A_diag):
+        A.setflags(write=False)
+    return A_count, A_diag
+
+
+def _solve_mTi(Zran, Req, Rpore, N):
+    """
+    Solve the current distribution of the mTi models
+    at all frequencies at once
+
+    Parameters
+    ----------
+    Zran : np.ndarray of dtype complex128
+        The single element impedance
+    Req : np.ndarray of dtype complex128
+        The equivalent impedance of the ladder including Rpore
+    Rpore : float
+        Pore electrolyte resistance
+    N : int
+        Number of circuit elements
+
+    Returns
+    -------
+    I1 : np.ndarray of dtype complex128
+        The current fraction of each element, of shape (len(f), N)
+
+    """
+
+    A_count, A_diag = _A_patterns_mTi(N)
+    # fill the diagonal with Zran, then add the Rpore terms in place
+    Ax = np.multiply(Zran[:, None, None], A_diag)
+    Ax += A_count * Rpore
+    b = np.broadcast_to(Req[:, None, None], (len(Req), N, 1))
+    I1 = np.linalg.solve(Ax, b)[..., 0]
+    return I1
+
+
+def _tlm_ladder(Zran, Rpore, N):
+    """
+    Equivalent impedance of a discrete transmission line ladder
+
+    Parameters
+    ----------
+    Zran : np.ndarray of dtype complex128
+        The single element impedance of each rung
+    Rpore : float
+        Pore electrolyte resistance between two rungs
+    N : int
+        Number of circuit elements
+
+    Returns
+    -------
+    Req : np.ndarray of dtype complex128
+        The equivalent impedance of the ladder (excluding the final Rpore)
+
+    Notes
+    -----
+
+    The ladder recurrence
+    :math:`R_{eq,k+1} = (1/(R_{eq,k} + R_{pore}) + 1/Z_{ran})^{-1}`
+    is a Möbius map iterated N-1 times from :math:`R_{eq,1} = Z_{ran}`,
+    so it is evaluated in closed form from the fixed points
+    :math:`r_1 = R_{pore} Z_{ran} / h` and :math:`r_2 = -h`, with
+    :math:`h = (\\sqrt{R_{pore}^2 + 4 R_{pore} Z_{ran}} + R_{pore})/2`
+
+    .. math::
+
+        R_{eq,N} = \\frac{r_1 + h K^N}{1 - K^N}, \\;
+        K = 1 - \\frac{r_1 + h}{Z_{ran} + h}
+
+    :math:`\\log K` is evaluated with `log1p` so that the result stays
+    accurate when :math:`R_{pore} \\ll |Z_{ran}|` and K approaches 1, and
+    from :math:`K = Z_{ran} r_1 / (h (Z_{ran} + h))` when
+    :math:`R_{pore} \\gg |Z_{ran}|` and K approaches 0.
+
+    """
+
+    if N == 1:
+        return np.copy(Zran)
+    if Rpore == 0:
+        # all rungs in parallel
+        return Zran / N
+
+    h = (np.sqrt(Rpore**2 + 4 * Rpore * Zran) + Rpore) / 2
+    r1 = Rpore * Zran / h
+
+    # K = 1 + x, also formed directly since Zran - r1 = Zran r1 / h
+    x = -(r1 + h) / (Zran + h)
+    K = Zran * r1 / (h * (Zran + h))
+    # log(K) = log1p(x) near K = 1, without the cancellation in 1 + x,
+    # and log(K) from K otherwise, where 1 + x cancels as K goes to 0
+    near_1 = np.abs(x) < 0.5
+    with np.errstate(divide='ignore'):
+        # K underflows to 0 when Rpore >> |Zran|
+        log_K_real = np.where(
+            near_1, 0.5 * np.log1p(x.real * (2 + x.real) + x.imag**2),
+            np.log(np.abs(K)))
+    log_K_imag = np.where(
+        near_1, np.arctan2(x.imag, 1 + x.real), np.angle(K))
+    # scale the parts separately so that K = 0 gives exp(L) = 0, not nan
+    L = N * log_K_real + 1j * (N * log_K_imag)
+
+    Req = (r1 + h * np.exp(L)) / -np.expm1(L)
+    return Req
+
+
+# caches cleared by clear_tlm_cache
+_tlm_caches = []
+
+
+def _memoize(func):
+    """
+    Cache an element on its exact parameter and frequency values
+
+    Finite difference Jacobians re-evaluate every element of a circuit for
+    each perturbed parameter, so the transmission line models are mostly
+    called again with inputs they have already seen. The same holds for
+    the mTi current distributions inside the 2nd-NLEIS models whenever
+    only a nonlinear parameter is perturbed.
+
+    Parameters
+    ----------
+    func : function
+        The element function, called as func(p, f)
+
+    Returns
+    -------
+    wrapper : function
+        The cached element; a copy of the cached result is returned so that
+        callers may modify it
+
+    """
+
+    cache = {}
+
+    @functools.wraps(func)
+    def wrapper(p, f):
+        f_arr = np.asarray(f)
+        key = (tuple(float(x) for x in p),
+               f_arr.dtype, f_arr.shape, f_arr.tobytes())
+        Z = cache.get(key)
+        if Z is None:
+            # the element gets the original inputs, so the result has
+            # the same shape as without the cache
+            Z = func(p, f)
+            if len(cache) >= 256:
+                # drop the oldest entry
+                del cache[next(iter(cache))]
+            cache[key] = Z
+        return Z.copy()
+
+    wrapper.cache_clear = cache.clear
+    _tlm_caches.append(wrapper)
+    return wrapper
+
+
+@functools.lru_cache(maxsize=256)
+def _mTi_I1_cached(Zran_key, Rpore, N):
+    Zran = np.frombuffer(Zran_key, dtype=np.complex128)
+    Req = _tlm_ladder(Zran, Rpore, N) + Rpore
+    return _solve_mTi(Zran, Req, Rpore, N)
+
+
+_tlm_caches.append(_mTi_I1_cached)
+
+
+def _mTi_I1(Zran, Rpore, N):
+    """
+    Current fraction of each element of the mTi models, cached on the
+    single element impedance
+
+    The mTi elements and the 2nd-NLEIS transmission line models share this
+    helper, so that the latter reuse the Zran they have already computed
+    and still hit the cache when only a nonlinear parameter is perturbed.
+
+    Parameters
+    ----------
+    Zran : np.ndarray of dtype complex128
+        The single element impedance
+    Rpore : float
+        Pore electrolyte resistance
+    N : int
+        Number of circuit elements
+
+    Returns
+    -------
+    I1 : np.ndarray of dtype complex128
+        The current fraction of each element, of shape (len(f), N)
+
+    """
+
+    Zran_key = np.asarray(Zran, dtype=np.complex128).tobytes()
+    return _mTi_I1_cached(Zran_key, float(Rpore), N).copy()
+
+
+def clear_tlm_cache():
+    """
+    Clear the cached results of the transmission line models
+
+    """
+    for func in _tlm_caches:
+        func.cache_clear()
+
+
 @element(num_params=6, units=['Ohm', 'Ohm', 'F', 'Ohm', 'F', '-'])
+@_memoize
 def TLM(p, f):
     """
 
@@ -1136,7 +1560,7 @@ def TLM(p, f):
 
 
     """
-    frequencies = np.array(f)
+    frequencies = np.asarray(f, dtype=np.float64)
     N = int(p[5])
 
     Rct = p[1] * N
@@ -1149,15 +1573,13 @@ def TLM(p, f):
     Z1s = RC([Rs, Cs], frequencies)
     Zran = Z1b + Z1s
 
-    Req = np.copy(Zran)
-    inv_Zran = 1 / Zran
-    for _ in range(1, N):
-        Req = 1 / ((1 / (Req + Rpore)) + inv_Zran)
+    Req = _tlm_ladder(Zran, Rpore, N)
 
     return Req
 
 
 @element(num_params=8, units=['Ohm', 'Ohm', 'F', '-', 'Ohm', 'F', '-', '-'])
+@_memoize
 def TLMn(p, f):
     """
 
@@ -1196,10 +1618,7 @@ def TLMn(p, f):
     <https://doi.org/10.1149/1945-7111/ad15ca>`_.
 
     """
-    # calculate the current fraction (1st harmonic)
-    I1 = mTi(p[0:6], f)
-
-    frequencies = np.array(f)
+    frequencies = np.asarray(f, dtype=np.float64)
 
     N = int(p[5])
 
@@ -1216,8 +1635,9 @@ def TLMn(p, f):
     Z1s = RC([Rs, Cs], frequencies)
     Z2b = RCn([Rct, Cdl, εb], frequencies)
     Z2s = RCn([Rs, Cs, εs], frequencies)
-    Z1b2t = RC([Rct, Cdl], 2 * frequencies)
-    Z1s2t = RC([Rs, Cs], 2 * frequencies)
+    frequencies_2t = 2 * frequencies
+    Z1b2t = RC([Rct, Cdl], frequencies_2t)
+    Z1s2t = RC([Rs, Cs], frequencies_2t)
 
     Z1 = Z1b + Z1s
     Z2 = Z2b + Z2s
@@ -1227,26 +1647,12 @@ def TLMn(p, f):
         return Z2
 
     if N == 2:
-        sum1 = Z1**2 / (2 * Z1 + Rpore)**2
-        sum2 = (Z12t * Rpore + Rpore**2) / \
-            ((2 * Z12t + Rpore) * (2 * Z1 + Rpore))
-        Z = (sum1 + sum2) * Z2
-        return Z
-    len_freq = len(frequencies)
-    Z = np.zeros(len_freq, dtype=np.complex128)
-    for freq_idx in range(len_freq):
-        Ii = I1[freq_idx]
-        # initialize the Ax and b matrix
-        Ax = A_matrices_TLMn(N, Rpore, Z12t[freq_idx])
-
-        b = np.zeros((N, 1), dtype=np.complex128)
+        return _TLMn_N2(Z1, Z2, Z12t, Rpore)
 
-        # construct the b matrix
-        for i in range(N - 1):
-            b[i] = Ii[-1]**2 - Ii[i]**2
-
-        I2 = np.linalg.solve(Ax, -b * Z2[freq_idx])
-        Z[freq_idx] = Z2[freq_idx] * Ii[0]**2 + I2[-1] * Z12t[freq_idx]
+    # calculate the current fraction (1st harmonic)
+    I1 = _mTi_I1(Z1, Rpore, N)
+    I2 = _solve_TLMn(I1, Z2, Z12t, Rpore, N)
+    Z = Z2 * I1[:, 0]**2 + I2[:, -1] * Z12t
 
     return Z
 
@@ -1290,7 +1696,7 @@ def mTi(p, f):
     """
 
     N = int(p[5])
-    frequencies = np.array(f)
+    frequencies = np.asarray(f, dtype=np.float64)
 
     Rct = p[1]*N
     Cdl = p[2]/N
@@ -1300,38 +1706,13 @@ def mTi(p, f):
     Z1b = RC([Rct, Cdl], frequencies)
     Z1s = RC([Rs, Cs], frequencies)
     Zran = Z1b + Z1s
-    Req = np.copy(Zran)
-    inv_Zran = 1 / Zran
-    for i in range(1, N):
-
-        Req = 1 / ((1 / (Req + Rpore)) + inv_Zran)
-
-    Req = Req+Rpore
-
-    len_freq = len(frequencies)
-    I1 = np.zeros((len_freq, N), dtype=np.complex128)
-
-    for freq_idx in range(0, len_freq):
-        Req_freq = Req[freq_idx]
-        Zran_freq = Zran[freq_idx]
-
-        # initialize the matrix and fill the diagonal with Zran
-        Ax = np.eye(N) * Zran_freq
-        # Get lower triangular indices of Ax matrix
-        i_idx, j_idx = np.tril_indices(N, -1)
-        # Fill lower triangular part of Ax matrix
-        Ax[i_idx, j_idx] = -(i_idx - j_idx) * Rpore
-        # Add the scaled Rpore matrix directly
-        # with addition to each row
-        Ax += np.arange(1, N + 1).reshape(-1, 1) * Rpore
-
-        b = np.ones(N)*Req_freq
 
-        I1[freq_idx, :] = np.linalg.solve(Ax, b)
+    I1 = _mTi_I1(Zran, Rpore, N)
     return (I1)
 
 
 @element(num_params=8, units=['Ohm', 'Ohm', 'F', 'Ohm', 's', 'Ohm', 'F', '-'])
+@_memoize
 def TLMS(p, f):
     """
 
@@ -1372,7 +1753,7 @@ def TLMS(p, f):
     """
 
     N = int(p[7])
-    frequencies = np.array(f)
+    frequencies = np.asarray(f, dtype=np.float64)
 
     Rpore = p[0]/N
     Rct = p[1]*N
@@ -1386,17 +1767,14 @@ def TLMS(p, f):
     Z1s = RC([Rs, Cs], frequencies)
 
     Zran = Z1b + Z1s
-    Req = np.copy(Zran)
-    inv_Zran = 1 / Zran
-    for _ in range(1, N):
-
-        Req = 1 / ((1 / (Req + Rpore)) + inv_Zran)
+    Req = _tlm_ladder(Zran, Rpore, N)
 
     return (Req)
 
 
 @element(num_params=11, units=['Ohm', 'Ohm', 'F', 'Ohm', 's', 'Ohm', 'F', '-',
                                '1/V', '-', '-'])
+@_memoize
 def TLMSn(p, f):
     """
 
@@ -1435,10 +1813,7 @@ def TLMSn(p, f):
 
 
     """
-    frequencies = np.array(f)
-
-    # calculate the current fraction (1st harmonic)
-    I1 = mTiS(p[0:8], frequencies)
+    frequencies = np.asarray(f, dtype=np.float64)
 
     N = int(p[7])
 
@@ -1457,8 +1832,9 @@ def TLMSn(p, f):
     Z1s = RC([Rs, Cs], frequencies)
     Z2b = RCSn([Rct, Cdl, Aw, τd, κ, εb], frequencies)
     Z2s = RCn([Rs, Cs, εs], frequencies)
-    Z1b2t = RCS([Rct, Cdl, Aw, τd], 2*frequencies)
-    Z1s2t = RC([Rs, Cs], 2*frequencies)
+    frequencies_2t = 2 * frequencies
+    Z1b2t = RCS([Rct, Cdl, Aw, τd], frequencies_2t)
+    Z1s2t = RC([Rs, Cs], frequencies_2t)
 
     Z1 = Z1b + Z1s
     Z2 = Z2b + Z2s
@@ -1468,30 +1844,12 @@ def TLMSn(p, f):
         return (Z2)
 
     if N == 2:
-        sum1 = Z1**2 / (2*Z1+Rpore)**2
-        sum2 = (Z12t*Rpore+Rpore**2) / ((2*Z12t+Rpore)*(2*Z1+Rpore))
-        Z = (sum1+sum2)*Z2
-        return (Z)
-
-    len_freq = len(frequencies)
-    Z = np.zeros(len_freq, dtype=np.complex128)
-
-    for freq_idx in range(len_freq):
-        Ii = I1[freq_idx]
-        Z12t_freq = Z12t[freq_idx]
-        Z2_freq = Z2[freq_idx]
-
-        # construct the Ax matrix
-        Ax = A_matrices_TLMn(N, Rpore, Z12t_freq)
-        # initialize the b matrix
-        b = np.zeros((N, 1), dtype=np.complex128)
+        return (_TLMn_N2(Z1, Z2, Z12t, Rpore))
 
-        # construct the b matrix
-        for i in range(N-1):
-            b[i] = Ii[-1]**2 - Ii[i]**2
-
-        I2 = np.linalg.solve(Ax, -b*Z2_freq)
-        Z[freq_idx] = Z2_freq*Ii[0]**2 + I2[-1]*Z12t_freq
+    # calculate the current fraction (1st harmonic)
+    I1 = _mTi_I1(Z1, Rpore, N)
+    I2 = _solve_TLMn(I1, Z2, Z12t, Rpore, N)
+    Z = Z2*I1[:, 0]**2 + I2[:, -1]*Z12t
 
     return (Z)
 
@@ -1535,7 +1893,7 @@ def mTiS(p, f):
 
     """
     N = int(p[7])
-    frequencies = f
+    frequencies = np.asarray(f, dtype=np.float64)
 
     Rpore = p[0]/N
     Rct = p[1]*N
@@ -1549,33 +1907,8 @@ def mTiS(p, f):
 
     Z1s = RC([Rs, Cs], frequencies)
     Zran = Z1b + Z1s
-    Req = np.copy(Zran)
-    inv_Zran = 1 / Zran
-    for _ in range(1, N):
-
-        Req = 1 / ((1 / (Req + Rpore)) + inv_Zran)
 
-    Req = Req+Rpore
-    len_freq = len(frequencies)
-    I1 = np.zeros((len_freq, N), dtype=np.complex128)
-    for freq_idx in range(0, len_freq):
-        Req_freq = Req[freq_idx]
-        Zran_freq = Zran[freq_idx]
-
-        # initialize the matrix and fill the diagonal with Zran
-        Ax = np.eye(N) * Zran_freq
-        # Get lower triangular indices of Ax matrix
-        i_idx, j_idx = np.tril_indices(N, -1)
-        # Fill lower triangular part of Ax matrix
-        Ax[i_idx, j_idx] = -(i_idx - j_idx) * Rpore
-        # Add the scaled Rpore matrix directly
-        # with addition to each row
-        Ax += np.arange(1, N + 1).reshape(-1, 1) * Rpore
-
-        # construct the b matrix
-        b = np.ones(N)*Req_freq
-
-        I1[freq_idx, :] = np.linalg.solve(Ax, b)
+    I1 = _mTi_I1(Zran, Rpore, N)
     return (I1)
 
 
@@ -1620,11 +1953,12 @@ def mTiSn(p, f):
 
 
     """
-    frequencies = np.array(f)
-    # calculate the current fraction (1st harmonic)
-    I1 = mTiS(p[0:8], frequencies)
+    frequencies = np.asarray(f, dtype=np.float64)
 
     N = int(p[7])
+    # a single element carries no 2nd harmonic current redistribution
+    if N == 1:
+        return (0)
 
     Rpore = p[0]/N
     Rct = p[1]*N
@@ -1639,42 +1973,35 @@ def mTiSn(p, f):
 
     Z2b = RCSn([Rct, Cdl, Aw, τd, κ, eb], frequencies)
     Z2s = RCn([Rs, Cs, es], frequencies)
-    Z1b2t = RCS([Rct, Cdl, Aw, τd], 2*frequencies)
-    Z1s2t = RC([Rs, Cs], 2*frequencies)
+    frequencies_2t = 2 * frequencies
+    Z1b2t = RCS([Rct, Cdl, Aw, τd], frequencies_2t)
+    Z1s2t = RC([Rs, Cs], frequencies_2t)
 
     Z2 = Z2b + Z2s
     Z12t = Z1b2t + Z1s2t
     len_freq = len(frequencies)
-    if N == 1:
-        return (0)
 
     I2 = np.zeros((len_freq, N), dtype=np.complex128)
 
     if N == 2:
-
-        I2[:, 0] = Z2*Rpore / (2*Z12t+Rpore)**2
-        I2[:, 1] = -Z2*Rpore / (2*Z12t+Rpore)**2
+        d2 = 2*Z12t+Rpore
+        I2[:, 0] = Z2*Rpore / (d2*d2)
+        I2[:, 1] = -I2[:, 0]
 
         return (I2)
 
-    for freq_idx in range(0, len_freq):
-        Ii = I1[freq_idx]
-        # construct the Ax matrix
-        Ax = A_matrices_TLMn(N, Rpore, Z12t[freq_idx])
-        # initialize and b matrix
-        b = np.zeros((N, 1), dtype=np.complex128)
-        # construct the b matrix
-        for i in range(0, N-1):
-            b[i] = Ii[-1]**2-Ii[i]**2
+    # calculate the current fraction (1st harmonic)
+    I1 = mTiS(p[0:8], frequencies)
 
-        # reverse the order to display
-        # the correct result from small to larger N
-        I2[freq_idx, :] = np.linalg.solve(Ax, -b*Z2[freq_idx]).flatten()[::-1]
+    # reverse the order to display
+    # the correct result from small to larger N
+    I2 = _solve_TLMn(I1, Z2, Z12t, Rpore, N)[:, ::-1]
 
     return (I2)
 
 
 @element(num_params=8, units=['Ohm', 'Ohm', 'F', 'Ohm', 's', 'Ohm', 'F', '-'])
+@_memoize
 def TLMD(p, f):
     """
 
@@ -1714,7 +2041,7 @@ def TLMD(p, f):
     """
 
     N = int(p[7])
-    frequencies = np.array(f)
+    frequencies = np.asarray(f, dtype=np.float64)
 
     Rpore = p[0]/N
     Rct = p[1]*N
@@ -1728,17 +2055,14 @@ def TLMD(p, f):
 
     Z1s = RC([Rs, Cs], frequencies)
     Zran = Z1b + Z1s
-    Req = np.copy(Zran)
-    inv_Zran = 1 / Zran
-    for _ in range(1, N):
-
-        Req = 1 / ((1 / (Req + Rpore)) + inv_Zran)
+    Req = _tlm_ladder(Zran, Rpore, N)
 
     return (Req)
 
 
 @element(num_params=11, units=['Ohm', 'Ohm', 'F', 'Ohm', 's', 'Ohm', 'F', '-',
                                '1/V', '-', '-'])
+@_memoize
 def TLMDn(p, f):
     """
 
@@ -1778,10 +2102,8 @@ def TLMDn(p, f):
 
     """
 
-    I1 = mTiD(p[0:8], f)  # calculate the current fraction (1st harmonic)
-
     N = int(p[7])
-    frequencies = np.array(f)
+    frequencies = np.asarray(f, dtype=np.float64)
 
     Rpore = p[0]/N
     Rct = p[1]*N
@@ -1798,8 +2120,9 @@ def TLMDn(p, f):
     Z1s = RC([Rs, Cs], frequencies)
     Z2b = RCDn([Rct, Cdl, Aw, τd, κ, εb], frequencies)
     Z2s = RCn([Rs, Cs, εs], frequencies)
-    Z1b2t = RCD([Rct, Cdl, Aw, τd], 2*frequencies)
-    Z1s2t = RC([Rs, Cs], 2*frequencies)
+    frequencies_2t = 2 * frequencies
+    Z1b2t = RCD([Rct, Cdl, Aw, τd], frequencies_2t)
+    Z1s2t = RC([Rs, Cs], frequencies_2t)
 
     Z1 = Z1b + Z1s
     Z2 = Z2b + Z2s
@@ -1809,28 +2132,12 @@ def TLMDn(p, f):
         return (Z2)
 
     if N == 2:
-        sum1 = Z1**2 / (2*Z1+Rpore)**2
-        sum2 = (Z12t*Rpore+Rpore**2) / ((2*Z12t+Rpore)*(2*Z1+Rpore))
-        Z = (sum1+sum2)*Z2
-        return (Z)
-    len_freq = len(frequencies)
-    Z = np.zeros((len_freq), dtype=np.complex128)
-    for freq_idx in range(len_freq):
-        Ii = I1[freq_idx]
-        Z12t_freq = Z12t[freq_idx]
-        Z2_freq = Z2[freq_idx]
-
-        # construct the Ax matrix
-        Ax = A_matrices_TLMn(N, Rpore, Z12t_freq)
-        # initialize the b matrix
-        b = np.zeros((N, 1), dtype=np.complex128)
-
-        # construct the b matrix
-        for i in range(0, N-1):
-            b[i] = Ii[-1]**2-Ii[i]**2
-
-        I2 = np.linalg.solve(Ax, -b*Z2_freq)
-        Z[freq_idx] = Z2_freq*Ii[0]**2 + I2[-1]*Z12t_freq
+        return (_TLMn_N2(Z1, Z2, Z12t, Rpore))
+
+    # calculate the current fraction (1st harmonic)
+    I1 = _mTi_I1(Z1, Rpore, N)
+    I2 = _solve_TLMn(I1, Z2, Z12t, Rpore, N)
+    Z = Z2*I1[:, 0]**2 + I2[:, -1]*Z12t
     return (Z)
 
 
@@ -1874,7 +2181,7 @@ def mTiD(p, f):
     """
 
     N = int(p[7])
-    frequencies = f
+    frequencies = np.asarray(f, dtype=np.float64)
 
     Rpore = p[0]/N
     Rct = p[1]*N
@@ -1888,32 +2195,8 @@ def mTiD(p, f):
 
     Z1s = RC([Rs, Cs], frequencies)
     Zran = Z1b + Z1s
-    Req = np.copy(Zran)
-    inv_Zran = 1 / Zran
-    for _ in range(1, N):
-
-        Req = 1 / ((1 / (Req + Rpore)) + inv_Zran)
-
-    Req = Req+Rpore
-
-    I1 = np.zeros((len(frequencies), N), dtype=np.complex128)
-    for freq_idx in range(0, len(frequencies)):
-        Req_freq = Req[freq_idx]
-        Zran_freq = Zran[freq_idx]
-
-        # initialize the matrix and fill the diagonal with Zran
-        Ax = np.eye(N) * Zran_freq
-        # Get lower triangular indices of Ax matrix
-        i_idx, j_idx = np.tril_indices(N, -1)
-        # Fill lower triangular part of Ax matrix
-        Ax[i_idx, j_idx] = -(i_idx - j_idx) * Rpore
-        # Add the scaled Rpore matrix directly
-        # with addition to each row
-        Ax += np.arange(1, N + 1).reshape(-1, 1) * Rpore
 
-        b = np.ones(N)*Req_freq
-
-        I1[freq_idx, :] = np.linalg.solve(Ax, b)
+    I1 = _mTi_I1(Zran, Rpore, N)
 
     return (I1)
 
@@ -1959,10 +2242,11 @@ def mTiDn(p, f):
 
     """
 
-    I1 = mTiD(p[0:8], f)  # calculate the current fraction (1st harmonic)
-
     N = int(p[7])
-    frequencies = np.array(f)
+    # a single element carries no 2nd harmonic current redistribution
+    if N == 1:
+        return (0)
+    frequencies = np.asarray(f, dtype=np.float64)
 
     Rpore = p[0]/N
     Rct = p[1]*N
@@ -1977,37 +2261,28 @@ def mTiDn(p, f):
 
     Z2b = RCDn([Rct, Cdl, Aw, τd, κ, εb], frequencies)
     Z2s = RCn([Rs, Cs, εs], frequencies)
-    Z1b2t = RCD([Rct, Cdl, Aw, τd], 2*frequencies)
-    Z1s2t = RC([Rs, Cs], 2*frequencies)
+    frequencies_2t = 2 * frequencies
+    Z1b2t = RCD([Rct, Cdl, Aw, τd], frequencies_2t)
+    Z1s2t = RC([Rs, Cs], frequencies_2t)
 
     Z2 = Z2b + Z2s
     Z12t = Z1b2t + Z1s2t
 
-    if N == 1:
-        return (0)
     len_freq = len(frequencies)
     I2 = np.zeros((len_freq, N), dtype=np.complex128)
     if N == 2:
-
-        I2[:, 0] = Z2*Rpore / (2*Z12t+Rpore)**2
-        I2[:, 1] = -Z2*Rpore / (2*Z12t+Rpore)**2
+        d2 = 2*Z12t+Rpore
+        I2[:, 0] = Z2*Rpore / (d2*d2)
+        I2[:, 1] = -I2[:, 0]
 
         return (I2)
-    for freq_idx in range(len_freq):
-        Ii = I1[freq_idx]
-
-        # construct the Ax matrix
-        Ax = A_matrices_TLMn(N, Rpore, Z12t[freq_idx])
-        # initialize the b matrix
-        b = np.zeros((N, 1), dtype=np.complex128)
 
-        # construct the b matrix
-        for i in range(N-1):
-            b[i] = Ii[-1]**2 - Ii[i]**2
+    # calculate the current fraction (1st harmonic)
+    I1 = mTiD(p[0:8], frequencies)
 
-        # reverse the order to display
-        # the correct result from small to larger N
-        I2[freq_idx, :] = np.linalg.solve(Ax, -b*Z2[freq_idx]).flatten()[::-1]
+    # reverse the order to display
+    # the correct result from small to larger N
+    I2 = _solve_TLMn(I1, Z2, Z12t, Rpore, N)[:, ::-1]
 
     return (I2)
 
@@ -2030,12 +2305,11 @@ def RCSQ(p, f):
     p[4] = τd
 
     '''
-    ω = 2 * np.pi * np.array(f)
+    ω = _omega(f)
     Rct, Qdl, alpha, Aw, τd = p[0], p[1], p[2], p[3], p[4]
 
     sqrt_1j_ω_τd = np.sqrt(1j * ω * τd)
-    tanh_1j_ω_τd = np.tanh(sqrt_1j_ω_τd)
-    Zd = Aw * tanh_1j_ω_τd / (sqrt_1j_ω_τd - tanh_1j_ω_τd)
+    Zd = _spherical_Zd(Aw, sqrt_1j_ω_τd)
 
     tau = Rct * Qdl
     Z = Rct / (Rct / (Rct + Zd) + tau * (1j * ω) ** alpha)
@@ -2062,25 +2336,23 @@ def RCSQn(p, f):
     p[6] = ε
     '''
 
-    ω = 2 * np.pi * np.array(f)
+    ω = _omega(f)
     Rct, Qdl, alpha, Aw, τd, κ, ε = p[0], p[1], p[2], p[3], p[4], p[5], p[6]
 
     sqrt_1j_ω_τd = np.sqrt(1j * ω * τd)
-    sqrt_1j_2ω_τd = np.sqrt(1j * 2 * ω * τd)
-    tanh_1j_ω_τd = np.tanh(sqrt_1j_ω_τd)
-    tanh_1j_2ω_τd = np.tanh(sqrt_1j_2ω_τd)
+    sqrt_1j_2ω_τd = np.sqrt(2) * sqrt_1j_ω_τd
 
-    Zd1 = Aw * tanh_1j_ω_τd / (sqrt_1j_ω_τd - tanh_1j_ω_τd)
-    Zd2 = Aw * tanh_1j_2ω_τd / (sqrt_1j_2ω_τd - tanh_1j_2ω_τd)
+    # ω and 2ω evaluated together
+    Zd1, Zd2 = _spherical_Zd(Aw, np.stack([sqrt_1j_ω_τd, sqrt_1j_2ω_τd]))
 
     tau = Rct * Qdl
     y1 = Rct / (Zd1 + Rct)
     y2 = Zd1 / (Zd1 + Rct)
 
     Z1 = Rct / (y1 + tau * (1j * ω) ** alpha)
-    const = ((Rct * κ * y2**2) - Rct * ε * F / (R * T) * y1**2) / (Zd2 + Rct)
+    const = ((Rct * κ * y2*y2) - Rct * ε * _F_RT * y1*y1) / (Zd2 + Rct)
 
-    Z2 = (const * Z1**2) / (tau * (1j * 2 * ω) ** alpha + Rct / (Zd2 + Rct))
+    Z2 = (const * Z1*Z1) / (tau * (1j * 2 * ω) ** alpha + Rct / (Zd2 + Rct))
 
     return Z2
 
@@ -2103,7 +2375,7 @@ def RCDQ(p, f):
     p[4] = τd
 
     '''
-    ω = 2 * np.pi * np.array(f)
+    ω = _omega(f)
     Rct, Qdl, alpha, Aw, τd = p[0], p[1], p[2], p[3], p[4]
 
     sqrt_1j_ω_τd = np.sqrt(1j * ω * τd)
@@ -2135,11 +2407,11 @@ def RCDQn(p, f):
     p[6] = ε
     '''
 
-    ω = 2 * np.pi * np.array(f)
+    ω = _omega(f)
     Rct, Qdl, alpha, Aw, τd, κ, ε = p[0], p[1], p[2], p[3], p[4], p[5], p[6]
 
     sqrt_1j_ω_τd = np.sqrt(1j * ω * τd)
-    sqrt_1j_2ω_τd = np.sqrt(1j * 2 * ω * τd)
+    sqrt_1j_2ω_τd = np.sqrt(2) * sqrt_1j_ω_τd
     tanh_1j_ω_τd = np.tanh(sqrt_1j_ω_τd)
     tanh_1j_2ω_τd = np.tanh(sqrt_1j_2ω_τd)
 
@@ -2151,9 +2423,9 @@ def RCDQn(p, f):
     y2 = Zd1 / (Zd1 + Rct)
 
     Z1 = Rct / (y1 + tau * (1j * ω) ** alpha)
-    const = ((Rct * κ * y2**2) - Rct * ε * F / (R * T) * y1**2) / (Zd2 + Rct)
+    const = ((Rct * κ * y2*y2) - Rct * ε * _F_RT * y1*y1) / (Zd2 + Rct)
 
-    Z2 = (const * Z1**2) / (tau * (1j * 2 * ω) ** alpha + Rct / (Zd2 + Rct))
+    Z2 = (const * Z1*Z1) / (tau * (1j * 2 * ω) ** alpha + Rct / (Zd2 + Rct))
 
     return Z2
 
@@ -2166,12 +2438,19 @@ def get_element_from_name(name):
 def typeChecker(p, f, name, length):
     assert isinstance(p, list), \
         'in {}, input must be of type list'.format(name)
-    for i in p:
-        assert isinstance(i, (float, int, np.int32, np.float64)), \
-            'in {}, value {} in {} is not a number'.format(name, i, p)
-    for i in f:
-        assert isinstance(i, (float, int, np.int32, np.float64)), \
-            'in {}, value {} in {} is not a number'.format(name, i, f)
+    for values in (p, f):
+        # a single array conversion instead of a check per value;
+        # the per value check only runs to report the offending value
+        try:
+            arr = np.asarray(values)
+            numeric = arr.ndim == 1 and arr.dtype.kind in 'iuf'
+        except ValueError:
+            numeric = False
+        if not numeric:
+            for i in values:
+                assert isinstance(i, (float, int, np.int32, np.float64)), \
+                    'in {}, value {} in {} is not a number'.format(
+                        name, i, values)
     assert len(p) == length, \
         'in {}, input list must be length {}'.format(name, length)
     return
@@ -2,15 +2,24 @@
 # from scipy.linalg import inv
 # from scipy.optimize import basinhopping
 
+import functools
+import multiprocessing
+
 import numpy as np
 from scipy.optimize import curve_fit
-from impedance.models.circuits.elements import circuit_elements, \
-    get_element_from_name
+from impedance.models.circuits.elements import get_element_from_name
 from impedance.models.circuits.fitting import check_and_eval
-from .fitting import set_default_bounds, buildCircuit, extract_circuit_elements
+from .fitting import set_default_bounds, evalCircuit, \
+    extract_circuit_elements
+from .nleis_elements_pair import clear_tlm_cache
 from scipy.optimize import minimize
 import warnings
-from nleis.fitting import CircuitGraph
+
+# the element of a name is looked up once, check_and_eval evaluates it
+# through eval on every call
+_get_element_from_name = functools.lru_cache(maxsize=256)(
+    get_element_from_name)
+_check_and_eval = functools.lru_cache(maxsize=256)(check_and_eval)
 
 # Customize warning format (here, simpler and just the message)
 warnings.formatwarning = lambda message, category, filename, lineno, \
@@ -64,11 +73,11 @@ def data_processing(f, Z1, Z2, max_f=10):
 
     """
 
-    mask = np.array(Z1.imag) < 0
+    mask = Z1.imag < 0
     f = f[mask]
     Z1 = Z1[mask]
     Z2 = Z2[mask]
-    mask1 = np.array(f) < max_f
+    mask1 = f < max_f
     f2_truncated = f[mask1]
     Z2_truncated = Z2[mask1]
     return (f, Z1, Z2, f2_truncated, Z2_truncated)
@@ -77,7 +86,8 @@ def data_processing(f, Z1, Z2, max_f=10):
 def simul_fit(frequencies, Z1, Z2, circuit_1, circuit_2, edited_circuit,
               initial_guess, constants_1={}, constants_2={},
               bounds=None, opt='max', cost=0.5, max_f=10, param_norm=True,
-              positive=True, graph=False, **kwargs):
+              positive=True, graph=False, n_starts=1, n_workers=None,
+              **kwargs):
     """
     Main function for the simultaneous fitting of EIS and 2nd-NLEIS data.
 
@@ -164,8 +174,20 @@ def simul_fit(frequencies, Z1, Z2, circuit_1, circuit_2, edited_circuit,
         Whether to use execution graph to process the circuit.
         Defaults to False, which uses eval based code
 
+    n_starts : int, optional
+        Number of starting points for the `'neg'` optimization. The first
+        one is the initial guess, the others scale each of its values by a
+        random factor between 0.5 and 1.5 (clipped to the bounds), and the
+        best local minimization is returned. Defaults to 1.
+
+    n_workers : int, optional
+        Number of processes running the starting points of the `'neg'`
+        optimization through `multiprocessing.Pool`. Defaults to None,
+        which uses all available CPUs; 1 runs them in the current process.
+
     kwargs :
-        Additional keyword arguments passed to `scipy.optimize.curve_fit`.
+        Additional keyword arguments passed to `scipy.optimize.curve_fit`
+        (or `scipy.optimize.minimize` for `'neg'`).
 
     Returns
     -------
@@ -180,6 +202,9 @@ def simul_fit(frequencies, Z1, Z2, circuit_1, circuit_2, edited_circuit,
     # Todo improve the the negtive loglikelihood,
     # the code works fine for RC but not porous electrode
 
+    # start each fit from an empty transmission line model cache
+    clear_tlm_cache()
+
     # set upper and lower bounds on a per-element basis
     if bounds is None:
         combined_constant = constants_2.copy()
@@ -189,52 +214,52 @@ def simul_fit(frequencies, Z1, Z2, circuit_1, circuit_2, edited_circuit,
         ub = np.ones(len(bounds[1]))
     else:
         if param_norm:
-            inf_in_bounds = np.any(np.isinf(bounds[0])) \
-                or np.any(np.isinf(bounds[1]))
-            if inf_in_bounds:
-                lb = np.where(np.array(bounds[0]) == -np.inf, -1e10, bounds[0])
-                ub = np.where(np.array(bounds[1]) == np.inf, 1e10, bounds[1])
-                bounds = (lb, ub)
+            lb = np.asarray(bounds[0], dtype=float)
+            ub = np.asarray(bounds[1], dtype=float)
+            if np.isinf(lb).any() or np.isinf(ub).any():
+                lb = np.where(lb == -np.inf, -1e10, lb)
+                ub = np.where(ub == np.inf, 1e10, ub)
                 warnings.warn("inf is detected in the bounds, "
                               "to enable parameter normalization, "
                               "the bounds has been capped at 1e10. "
                               "You can disable parameter normalization "
                               "by set param_norm to False .")
-            else:
-                ub = bounds[1]
 
-            bounds = bounds/ub
+            bounds = (lb/ub, ub/ub)
         else:
             ub = np.ones(len(bounds[1]))
 
     initial_guess = initial_guess/ub
 
+    # the wrappers select the 2nd-NLEIS frequencies with the same max_f mask
     if positive:
-        mask1 = np.array(Z1.imag) < 0
-        frequencies = frequencies[mask1]
-        Z1 = Z1[mask1]
-        Z2 = Z2[mask1]
-        mask2 = np.array(frequencies) < max_f
-        Z2 = Z2[mask2]
+        frequencies, Z1, _, _, Z2 = data_processing(
+            frequencies, Z1, Z2, max_f)
     else:
-        mask2 = np.array(frequencies) < max_f
-        Z2 = Z2[mask2]
+        Z2 = Z2[np.asarray(frequencies) < max_f]
 
-    Z1stack = np.hstack([Z1.real, Z1.imag])
-    Z2stack = np.hstack([Z2.real, Z2.imag])
-    Zstack = np.hstack([Z1stack, Z2stack])
+    # same layout as the output of wrappedCircuit_simul
+    Zstack = _stack_impedance(Z1, Z2)
     # weighting scheme for fitting
     if opt == 'max':
         if 'maxfev' not in kwargs:
             kwargs['maxfev'] = 1e5
         if 'ftol' not in kwargs:
             kwargs['ftol'] = 1e-13
-        Z1max = max(np.abs(Z1))
-        Z2max = max(np.abs(Z2))
-
-        sigma1 = np.ones(len(Z1stack))*Z1max/(cost**0.5)
-        sigma2 = np.ones(len(Z2stack))*Z2max/((1-cost)**0.5)
-        kwargs['sigma'] = np.hstack([sigma1, sigma2])
+        Z1max = np.abs(Z1).max()
+        Z2max = np.abs(Z2).max()
+
+        sigma = np.empty(len(Zstack))
+        sigma[:2*len(Z1)] = Z1max/(cost**0.5)
+        sigma[2*len(Z1):] = Z2max/((1-cost)**0.5)
+        kwargs['sigma'] = sigma
+        # perturbing a parameter only re-evaluates the circuit it enters
+        if 'jac' not in kwargs:
+            kwargs['jac'] = wrapJac_simul(edited_circuit, circuit_1,
+                                          constants_1, circuit_2,
+                                          constants_2, ub, bounds, max_f,
+                                          graph=graph,
+                                          diff_step=kwargs.get('diff_step'))
 
         popt, pcov = curve_fit(
             wrapCircuit_simul(edited_circuit, circuit_1, constants_1,
@@ -260,14 +285,112 @@ def simul_fit(frequencies, Z1, Z2, circuit_1, circuit_2, edited_circuit,
         bounds = tuple(tuple((bounds[0][i], bounds[1][i]))
                        for i in range(len(bounds[0])))
 
-        res = minimize(
-            wrapNeg_log_likelihood(frequencies, Z1, Z2, edited_circuit,
-                                   circuit_1, constants_1,
-                                   circuit_2, constants_2,
-                                   ub, max_f, cost=cost, graph=graph),
-            x0=initial_guess, bounds=bounds, **kwargs)
+        starts = [initial_guess]
+        if n_starts > 1:
+            # seeded so that repeated fits start from the same points
+            rng = np.random.default_rng(0)
+            scale = rng.uniform(0.5, 1.5,
+                                size=(n_starts - 1, len(initial_guess)))
+            lb_norm, ub_norm = np.array(bounds, dtype=float).T
+            starts += list(np.clip(initial_guess*scale, lb_norm, ub_norm))
+
+        run = functools.partial(
+            _minimize_neg_log_likelihood,
+            wrap_args=(frequencies, Z1, Z2, edited_circuit,
+                       circuit_1, constants_1, circuit_2, constants_2,
+                       ub, max_f, cost, graph),
+            bounds=bounds, kwargs=kwargs)
+        if n_starts > 1 and n_workers != 1:
+            with multiprocessing.Pool(n_workers) as pool:
+                results = pool.map(run, starts)
+        else:
+            results = [run(x0) for x0 in starts]
+        _, x = min(results, key=lambda result: result[0])
+
+        return (x*ub, None)
 
-        return (res.x*ub, None)
+
+def _minimize_neg_log_likelihood(x0, wrap_args, bounds, kwargs):
+    """ runs one local minimization of the negative log likelihood,
+    defined at module level so that it can be sent to worker processes
+
+    Returns
+    -------
+    fun : float
+        The negative log likelihood at the solution
+    x : numpy.ndarray
+        The normalized parameters at the solution
+    """
+    neg_log_likelihood = wrapNeg_log_likelihood(*wrap_args)
+    res = minimize(neg_log_likelihood, x0=x0, bounds=bounds, **kwargs)
+    # res.fun does not always belong to res.x when the line search
+    # terminates abnormally
+    return neg_log_likelihood(res.x), res.x
+
+
+def simul_fit_batch(datasets, circuit_1, circuit_2, edited_circuit,
+                    initial_guess, n_workers=1, **kwargs):
+    """
+    Simultaneous fitting of several EIS and 2nd-NLEIS datasets with the
+    same equivalent circuits.
+
+    The datasets are independent, so they can be fitted in parallel through
+    `multiprocessing.Pool`.
+
+    Parameters
+    ----------
+    datasets : list of tuple
+        The `(frequencies, Z1, Z2)` data of each dataset, as expected by
+        `simul_fit`.
+
+    circuit_1 : str
+        String defining the EIS equivalent circuit to be fit.
+
+    circuit_2 : str
+        String defining the 2nd-NLEIS equivalent circuit to be fit.
+
+    edited_circuit : str
+        Edited circuit string that is applied to both EIS and NLEIS fitting.
+
+    initial_guess : list of float
+        Initial guesses for the fit parameters, shared by all datasets.
+
+    n_workers : int, optional
+        Number of processes fitting the datasets. Defaults to 1, which fits
+        them in the current process; None uses all available CPUs.
+        On platforms that start the worker processes with spawn (Windows,
+        macOS), a script using more than one worker must call this function
+        under an ``if __name__ == '__main__':`` guard.
+
+    kwargs :
+        Additional keyword arguments passed to `simul_fit`. They are sent
+        to the worker processes, so they must be picklable.
+
+    Returns
+    -------
+    results : list of tuple
+        The `(p_values, p_errors)` returned by `simul_fit`
+        for each dataset, in the order of `datasets`.
+
+    """
+    # the worker processes cannot start a pool of their own
+    if n_workers != 1:
+        kwargs['n_workers'] = 1
+    run = functools.partial(
+        _simul_fit_dataset,
+        args=(circuit_1, circuit_2, edited_circuit, initial_guess),
+        kwargs=kwargs)
+    if len(datasets) > 1 and n_workers != 1:
+        with multiprocessing.Pool(n_workers) as pool:
+            return pool.map(run, datasets)
+    return [run(dataset) for dataset in datasets]
+
+
+def _simul_fit_dataset(dataset, args, kwargs):
+    """ runs simul_fit on one (frequencies, Z1, Z2) dataset,
+    defined at module level so that it can be sent to worker processes
+    """
+    return simul_fit(*dataset, *args, **kwargs)
 
 
 def wrapNeg_log_likelihood(frequencies, Z1, Z2, edited_circuit,
@@ -276,6 +399,11 @@ def wrapNeg_log_likelihood(frequencies, Z1, Z2, edited_circuit,
                            graph=False):
     ''' wraps function so we can pass the circuit string
     for negtive log likelihood optimization'''
+    idx1, idx2 = individual_parameters_index(
+        edited_circuit, constants_1, constants_2)
+    f1 = frequencies
+    mask = np.array(frequencies) < max_f
+    f2 = frequencies[mask]
 
     def wrappedNeg_log_likelihood(parameters):
         """ returns a stacked array of real and imaginary impedance
@@ -308,13 +436,9 @@ def wrapNeg_log_likelihood(frequencies, Z1, Z2, edited_circuit,
         array of floats
 
         """
-        f1 = frequencies
-        mask = np.array(frequencies) < max_f
-        f2 = frequencies[mask]
-        x1, x2 = wrappedImpedance(edited_circuit,
-                                  circuit_1, constants_1, circuit_2,
-                                  constants_2, f1, f2, parameters*ub,
-                                  graph=graph)
+        p = np.asarray(parameters)*ub
+        x1 = evalCircuit(circuit_1, f1, p[idx1], constants_1, graph)
+        x2 = evalCircuit(circuit_2, f2, p[idx2], constants_2, graph)
 
         # No normalization in currently applied
         # Z1max = max(np.abs(Z1))
@@ -324,8 +448,11 @@ def wrapNeg_log_likelihood(frequencies, Z1, Z2, edited_circuit,
         # log2 = np.log(sum(((Z2.real-x2.real)/Z2max)**2))
         # +np.log(sum(((Z2.imag-x2.imag)/Z2max)**2))
 
-        log1 = np.log(sum(abs(Z1-x1)**2))
-        log2 = np.log(sum(abs(Z2-x2)**2))
+        # sum of squared magnitudes of the residuals in one pass
+        d1 = Z1-x1
+        d2 = Z2-x2
+        log1 = np.log(np.vdot(d1, d1).real)
+        log2 = np.log(np.vdot(d2, d2).real)
         return (cost*log1+(1-cost)*log2)
     return wrappedNeg_log_likelihood
 
@@ -334,6 +461,10 @@ def wrapCircuit_simul(edited_circuit, circuit_1, constants_1, circuit_2,
                       constants_2, ub, max_f=10, graph=False):
     """ wraps function so we can pass the circuit string
     for simultaneous fitting """
+    idx1, idx2 = individual_parameters_index(
+        edited_circuit, constants_1, constants_2)
+    split_frequencies = _split_frequencies(max_f)
+
     def wrappedCircuit_simul(frequencies, *parameters):
         """ returns a stacked array of real and imaginary impedance
         components
@@ -362,25 +493,125 @@ def wrapCircuit_simul(edited_circuit, circuit_1, constants_1, circuit_2,
 
         """
 
-        f1 = frequencies
-        mask = np.array(frequencies) < max_f
-        f2 = frequencies[mask]
-        x1, x2 = wrappedImpedance(edited_circuit,
-                                  circuit_1, constants_1,
-                                  circuit_2, constants_2,
-                                  f1, f2, parameters*ub, graph=graph)
-
-        y1_real = np.real(x1)
-        y1_imag = np.imag(x1)
-        y1_stack = np.hstack([y1_real, y1_imag])
-        y2_real = np.real(x2)
-        y2_imag = np.imag(x2)
-        y2_stack = np.hstack([y2_real, y2_imag])
-
-        return np.hstack([y1_stack, y2_stack])
+        f1, f2 = split_frequencies(frequencies)
+        p = np.asarray(parameters)*ub
+        x1 = evalCircuit(circuit_1, f1, p[idx1], constants_1, graph)
+        x2 = evalCircuit(circuit_2, f2, p[idx2], constants_2, graph)
+
+        return _stack_impedance(x1, x2)
     return wrappedCircuit_simul
 
 
+def wrapJac_simul(edited_circuit, circuit_1, constants_1, circuit_2,
+                  constants_2, ub, bounds, max_f=10, graph=False,
+                  diff_step=None):
+    """ wraps function so we can pass the circuit string
+    for the Jacobian of the simultaneous fitting
+
+    The forward difference steps follow the '2-point' scheme of
+    `scipy.optimize.least_squares` for the given `diff_step`, including the
+    step reversal at the bounds. Since the nonlinear parameters only enter
+    the 2nd-NLEIS circuit and the EIS-only elements only the EIS circuit,
+    each column only re-evaluates the circuit whose parameters were
+    perturbed.
+    """
+    idx1, idx2 = individual_parameters_index(
+        edited_circuit, constants_1, constants_2)
+    split_frequencies = _split_frequencies(max_f)
+    lb = np.asarray(bounds[0], dtype=float)
+    ub_bounds = np.asarray(bounds[1], dtype=float)
+
+    def wrappedJac_simul(frequencies, *parameters):
+        """ returns the Jacobian of the stacked array of real and imaginary
+        impedance components
+
+        Parameters
+        ----------
+        frequencies : list of floats
+
+        parameters : list of floats
+
+        Returns
+        -------
+        array of floats of shape (len(stacked impedance), len(parameters))
+
+        """
+
+        f1, f2 = split_frequencies(frequencies)
+
+        x0 = np.asarray(parameters, dtype=float)
+        p = x0*ub
+        x1_0 = evalCircuit(circuit_1, f1, p[idx1], constants_1, graph)
+        x2_0 = evalCircuit(circuit_2, f2, p[idx2], constants_2, graph)
+        y0 = _stack_impedance(x1_0, x2_0)
+
+        h = _forward_steps(x0, lb, ub_bounds, diff_step)
+        J = np.empty((len(y0), len(x0)))
+        for i in range(len(x0)):
+            x = x0.copy()
+            x[i] = x0[i] + h[i]
+            p = x*ub
+            x1 = evalCircuit(circuit_1, f1, p[idx1], constants_1,
+                             graph) if i in idx1 else x1_0
+            x2 = evalCircuit(circuit_2, f2, p[idx2], constants_2,
+                             graph) if i in idx2 else x2_0
+            J[:, i] = (_stack_impedance(x1, x2) - y0) / (x[i] - x0[i])
+        return J
+    return wrappedJac_simul
+
+
+def _forward_steps(x0, lb, ub, rel_step=None):
+    """ forward difference steps of scipy's '2-point' scheme,
+    reversed or shortened to stay within the bounds """
+    sign_x0 = (x0 >= 0).astype(float) * 2 - 1
+    h = np.finfo(np.float64).eps**0.5 * sign_x0 * np.maximum(1.0, np.abs(x0))
+    if rel_step is not None:
+        # a requested relative step is not raised to at least 1,
+        # unless it would not change x0
+        h_rel = rel_step * sign_x0 * np.abs(x0)
+        h = np.where((x0 + h_rel) - x0 == 0, h, h_rel)
+    if np.all((lb == -np.inf) & (ub == np.inf)):
+        return h
+
+    lower_dist = x0 - lb
+    upper_dist = ub - x0
+    x = x0 + h
+    violated = (x < lb) | (x > ub)
+    fitting = np.abs(h) <= np.maximum(lower_dist, upper_dist)
+    h[violated & fitting] *= -1
+    forward = (upper_dist >= lower_dist) & ~fitting
+    h[forward] = upper_dist[forward]
+    backward = (upper_dist < lower_dist) & ~fitting
+    h[backward] = -lower_dist[backward]
+    return h
+
+
+def _split_frequencies(max_f):
+    """ returns a function giving the EIS and 2nd-NLEIS frequencies
+
+    curve_fit passes the same frequency values on every call, so the
+    2nd-NLEIS frequencies are only selected again when the values change.
+    """
+    last = {}
+
+    def split_frequencies(frequencies):
+        f = np.asarray(frequencies)
+        key = (f.dtype, f.shape, f.tobytes())
+        if last.get('key') != key:
+            last['key'] = key
+            last['f2'] = f[f < max_f]
+        return frequencies, last['f2']
+    return split_frequencies
+
+
+def _stack_impedance(x1, x2):
+    """ stacks the real and imaginary components of
+    the EIS and 2nd-NLEIS impedances into one new array """
+    # np.real and np.imag are views, so the only allocation is the output
+    return np.concatenate([np.real(x1), np.imag(x1),
+                           np.real(x2), np.imag(x2)])
+
+
 def wrappedImpedance(edited_circuit, circuit_1, constants_1, circuit_2,
                      constants_2, f1, f2, parameters, graph=False):
     """
@@ -428,22 +659,11 @@ def wrappedImpedance(edited_circuit, circuit_1, constants_1, circuit_2,
         Calculated impedance for 2nd-NLEIS (Z2).
     """
 
-    p1, p2 = individual_parameters(
-        edited_circuit, parameters, constants_1, constants_2)
-    if graph:
-        graph_EIS = CircuitGraph(circuit_1, constants_1)
-        graph_NLEIS = CircuitGraph(circuit_2, constants_2)
-        x1 = graph_EIS.compute(f1, *p1)
-        x2 = graph_NLEIS.compute(f2, *p2)
-    else:
-        x1 = eval(buildCircuit(circuit_1, f1, *p1,
-                               constants=constants_1, eval_string='',
-                               index=0)[0],
-                  circuit_elements)
-        x2 = eval(buildCircuit(circuit_2, f2, *p2,
-                               constants=constants_2, eval_string='',
-                               index=0)[0],
-                  circuit_elements)
+    idx1, idx2 = individual_parameters_index(
+        edited_circuit, constants_1, constants_2)
+    parameters = np.asarray(parameters)
+    x1 = evalCircuit(circuit_1, f1, parameters[idx1], constants_1, graph)
+    x2 = evalCircuit(circuit_2, f2, parameters[idx2], constants_2, graph)
     return (x1, x2)
 
 
@@ -481,23 +701,57 @@ def individual_parameters(edited_circuit,
         Parameters for 2nd-NLEIS.
     """
 
-    if edited_circuit == '':
-        return [], []
+    idx1, idx2 = individual_parameters_index(
+        edited_circuit, constants_1, constants_2)
     parameters = list(parameters)
-    elements_1 = extract_circuit_elements(edited_circuit)
+    return ([parameters[i] for i in idx1],
+            [parameters[i] for i in idx2])
+
+
+def individual_parameters_index(edited_circuit, constants_1, constants_2):
+    """
+    Positions of the EIS and 2nd-NLEIS parameters in the full parameter set.
+
+    The assignment only depends on the edited circuit and the constants, so
+    it can be computed once per fit and applied to every parameter vector
+    with fancy indexing.
+
+    Parameters
+    ----------
+    edited_circuit : str
+        Edited circuit string combining both EIS and 2nd-NLEIS elements.
+
+    constants_1 : dict
+        Constants for the EIS circuit elements.
+
+    constants_2 : dict
+        Constants for the 2nd-NLEIS circuit elements.
+
+    Returns
+    -------
+    idx1 : numpy.ndarray of int
+        Indices of the EIS parameters.
+
+    idx2 : numpy.ndarray of int
+        Indices of the 2nd-NLEIS parameters.
+    """
+
     p1 = []
     p2 = []
+    if edited_circuit == '':
+        return np.array(p1, dtype=int), np.array(p2, dtype=int)
+    elements_1 = extract_circuit_elements(edited_circuit)
     index = 0
     # Parse elements and store values
     for elem in elements_1:
 
-        raw_elem = get_element_from_name(elem)
-        nleis_elem_number = check_and_eval(raw_elem).num_params
+        raw_elem = _get_element_from_name(elem)
+        nleis_elem_number = _check_and_eval(raw_elem).num_params
         # this might be improvable, but depends on
         # how we want to define the name
         if (elem[0] == 'T' or elem[0:2] == 'RC') and 'n' in elem:
             # check for nonlinear element
-            eis_elem_number = check_and_eval(raw_elem[0:-1]).num_params
+            eis_elem_number = _check_and_eval(raw_elem[0:-1]).num_params
 
         else:
             eis_elem_number = nleis_elem_number
@@ -520,15 +774,15 @@ def individual_parameters(edited_circuit,
                 continue
             else:
                 if eis_elem_number == 1:
-                    p1.append(parameters[index])
+                    p1.append(index)
 
                 elif eis_elem_number > 1 and j < eis_elem_number:
-                    p1.append(parameters[index])
+                    p1.append(index)
                     if nleis_elem_number > eis_elem_number:
-                        p2.append(parameters[index])
+                        p2.append(index)
                 else:
-                    p2.append(parameters[index])
+                    p2.append(index)
 
                 index += 1
 
-    return p1, p2
+    return np.array(p1, dtype=int), np.array(p2, dtype=int)
@@ -33,6 +33,8 @@ def test_graph_NLEISCustomCircuit():
     Z2_eval = eval_circuit.predict(frequencies, max_f=np.inf)
     Z2_graph = graph_circuit.predict(frequencies, max_f=np.inf)
     assert np.allclose(Z2_eval, Z2_graph)
+    # NLEISCustomCircuit.predict builds the eval string or the graph on
+    # every call, so this compares the two uncached paths
     assert graph_time < eval_time
     print(f'eval_time: {eval_time}, graph_time: {graph_time}')
 
@@ -77,7 +79,8 @@ def test_graph_EISandNLEIS():
     assert np.allclose(Z1_eval, Z1_graph)
     assert np.allclose(Z2_eval, Z2_graph)
 
-    assert graph_time < eval_time
+    # wrappedImpedance compiles the eval string and builds the graph once
+    # per circuit, so neither path is expected to be consistently faster
     print(f'eval_time: {eval_time}, graph_time: {graph_time}')
 
     # test the fitting of the graph circuit using curve_fit and opt = 'max'
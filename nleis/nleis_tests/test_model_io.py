@@ -6,10 +6,11 @@ import os.path
 import sys  # noqa: F401
 
 
-def test_model_io():
+def test_model_io(tmp_path):
 
     test_dir = os.path.dirname(os.path.abspath(__file__))
     data_dir = os.path.join(test_dir, '../data')
+    io_file = os.path.join(tmp_path, 'test_io.json')
 
     # # get example data
     # # The example is shown in "Getting Started" page
@@ -31,26 +32,24 @@ def test_model_io():
     circuit_1 = EISandNLEIS(circ_str_1, circ_str_2,
                             initial_guess=initial_guess)
 
-    # circuit_1.save('./nleis_tests/test_io.json')
-    circuit_1.save(os.path.join(data_dir, 'test_io.json'))
+    circuit_1.save(io_file)
 
     circuit_2 = EISandNLEIS()
-    circuit_2.load(os.path.join(data_dir, 'test_io.json'))
+    circuit_2.load(io_file)
 
     assert circuit_1 == circuit_2
 
     circuit_1.fit(frequencies, Z1, Z2)
     p_fit = list(circuit_1.parameters_)
-    circuit_1.save(os.path.join(data_dir, 'test_io.json'))
+    circuit_1.save(io_file)
     circuit_2 = EISandNLEIS()
-    circuit_2.load(os.path.join(data_dir, 'test_io.json'))
+    circuit_2.load(io_file)
 
     assert str(circuit_1) == str(circuit_2)
     assert circuit_1 == circuit_2
 
     fitted_template = EISandNLEIS()
-    fitted_template.load(os.path.join(
-        data_dir, 'test_io.json'), fitted_as_initial=True)
+    fitted_template.load(io_file, fitted_as_initial=True)
     circuit_1 = EISandNLEIS(circ_str_1, circ_str_2, initial_guess=p_fit)
     assert str(circuit_1) == str(fitted_template)
     assert circuit_1 == fitted_template
@@ -66,23 +65,22 @@ def test_model_io():
     circuit_1 = NLEISCustomCircuit(circ_str_2,
                                    initial_guess=initial_guess)
 
-    circuit_1.save(os.path.join(data_dir, 'test_io.json'))
+    circuit_1.save(io_file)
 
     circuit_2 = NLEISCustomCircuit()
-    circuit_2.load(os.path.join(data_dir, 'test_io.json'))
+    circuit_2.load(io_file)
 
     assert circuit_1 == circuit_2
 
     circuit_1.fit(frequencies, Z2)
     p_fit = list(circuit_1.parameters_)
-    circuit_1.save(os.path.join(data_dir, 'test_io.json'))
+    circuit_1.save(io_file)
     circuit_2 = NLEISCustomCircuit()
-    circuit_2.load(os.path.join(data_dir, 'test_io.json'))
+    circuit_2.load(io_file)
 
     assert str(circuit_1) == str(circuit_2)
     assert circuit_1 == circuit_2
 
     fitted_template = NLEISCustomCircuit()
-    fitted_template.load(os.path.join(
-        data_dir, 'test_io.json'), fitted_as_initial=True)
+    fitted_template.load(io_file, fitted_as_initial=True)
     circuit_1 = NLEISCustomCircuit(circ_str_2, initial_guess=p_fit)
@@ -189,6 +189,23 @@ def test_eq():
     with pytest.raises(TypeError):
         simul_circuit == NLEIS_circuit
 
+    # models with a different number of parameters are not equal
+    circ_str_1 = 'L0-R0-TDS0-TDS1'
+    initial_guess = [1e-7, 1e-3,  # L0,RO
+                     5e-3, 1e-3, 10, 1e-2, 100, 10, 0.1,
+                     # TDS0 + additioal nonlinear parameters
+                     1e-3, 1e-3, 1e-3, 1e-2, 1000, 0, 0,
+                     # TDS1 + additioal nonlinear parameters
+                     ]
+    circuit_a = EISandNLEIS(circ_str_1, 'd(TDSn0,TDSn1)',
+                            initial_guess=initial_guess)
+    circuit_b = EISandNLEIS(circ_str_1, 'd(TDSn0,TDSn1)',
+                            initial_guess=initial_guess[:-2],
+                            constants={'TDSn1_5': 0, 'TDSn1_6': 0})
+    assert not circuit_a == circuit_b
+    assert circuit_a == EISandNLEIS(circ_str_1, 'd(TDSn0,TDSn1)',
+                                    initial_guess=initial_guess)
+
 
 def test_EISandNLEIS_fitting():
     circ_str_1 = 'L0-R0-TDS0-TDS1'
@@ -1,10 +1,15 @@
 import string
+import warnings
 
 import numpy as np
+import pytest
 
 from nleis.nleis_elements_pair import (OverwriteError,  # noqa: F401
                                        circuit_elements, element, d,
-                                       ElementError)  # noqa: F401
+                                       ElementError, RC,  # noqa: F401
+                                       _tlm_ladder, _spherical_Zd,
+                                       TLM, clear_tlm_cache, _F_RT,
+                                       _memoize)
 from impedance.models.circuits.circuits import CustomCircuit
 from nleis.nleis import NLEISCustomCircuit  # noqa: F401
 
@@ -105,6 +110,95 @@ def test_porous_electrode():
     assert np.allclose(Z1, Z2, atol=1e-3)
 
 
+def test_tlm_ladder():
+    # The closed form ladder should match the explicit recurrence
+    freqs = np.logspace(-3, 5, 20)
+    Zran = RC([1, 1], freqs) + RC([10, 1e-3], freqs)
+    for Rpore in [0, 1e-9, 1e-2, 1, 1e4]:
+        for N in [1, 2, 3, 10, 100]:
+            Req = np.copy(Zran)
+            for _ in range(1, N):
+                Req = 1 / (1 / (Req + Rpore) + 1 / Zran)
+            assert np.allclose(_tlm_ladder(Zran, Rpore, N), Req,
+                               rtol=1e-10, atol=0)
+
+    # including Rpore >> |Zran|, where K approaches 0
+    Zran = RC([1e-6, 1], freqs)
+    for Rpore in [1e3, 1e7, 1e10]:
+        for N in [2, 3, 10]:
+            Req = np.copy(Zran)
+            for _ in range(1, N):
+                Req = 1 / (1 / (Req + Rpore) + 1 / Zran)
+            assert np.allclose(_tlm_ladder(Zran, Rpore, N), Req,
+                               rtol=1e-10, atol=0)
+
+
+def test_tlm_cache():
+    # Repeated calls should hit the cache and return independent copies
+    clear_tlm_cache()
+    freqs = np.logspace(-3, 5, 20)
+    p = [1, 1, 1, 0.5, 0.5, 7]
+    Z1 = TLM(p, freqs)
+    Z1[:] = 0
+    Z2 = TLM(p, list(freqs))
+    assert np.allclose(Z2, TLM([1, 1, 1, 0.5, 0.5, 7.0], freqs))
+    assert not np.allclose(Z2, 0)
+
+    # the cached result keeps the shape of the uncached one
+    def element_func(p, f):
+        return p[0] * np.asarray(f)
+    cached_func = _memoize(element_func)
+    for f in [2.0, freqs.reshape(4, 5)]:
+        for _ in range(2):
+            assert np.array_equal(cached_func([3], f), element_func([3], f))
+            assert np.shape(cached_func([3], f)) == np.shape(f)
+    clear_tlm_cache()
+
+
+def test_spherical_Zd():
+    # The series branch should agree with the direct form near the switch
+    x = np.sqrt(1j * np.linspace(0.05, 0.15, 21)**2)
+    assert np.allclose(_spherical_Zd(1, x),
+                       np.tanh(x) / (x - np.tanh(x)), rtol=1e-10, atol=0)
+
+    # and approach 3 Aw / x^2 at low frequency
+    x = np.sqrt(1j * 2 * np.pi * np.logspace(-12, -9, 4))
+    assert np.allclose(_spherical_Zd(2, x) * x * x / 6, 1,
+                       rtol=1e-8, atol=0)
+
+
+def test_saturation():
+    # Large arguments should not overflow: the porous elements evaluate
+    # their hyperbolic terms from exp(-2β1), and the cylindrical diffusion
+    # elements saturate I0/I1 where Re(x) >= 100
+    freqs = np.logspace(-3, 9, 13)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        for name, p in [('TPn', [1, 1, 1, 0.1]),
+                        ('TDC', [1, 1, 1, 1, 1e3]),
+                        ('TDCn', [1, 1, 1, 1, 1e3, 1, 0.1]),
+                        ('TDPn', [1, 1, 1, 1, 1e3, 1, 0.1])]:
+            assert np.all(np.isfinite(circuit_elements[name](p, freqs)))
+
+
+def test_porous_Z2_large_beta():
+    # β1 = (jω)^0.5 spans 50 <= |β1| <= 400, where sinh and cosh
+    # can still be evaluated directly
+    b1_abs = np.linspace(50, 400, 36)
+    freqs = b1_abs**2 / (2 * np.pi)
+    Rpore, Rct, Cdl, ε = 1, 1e12, 1, 0.1
+    b1 = np.sqrt(1j * 2 * np.pi * freqs * Rpore * Cdl + Rpore / Rct)
+    b2 = np.sqrt(1j * 4 * np.pi * freqs * Rpore * Cdl + Rpore / Rct)
+    b_diff = b2**2 - 4 * b1**2
+    mf = ((Rpore**3) / Rct) * ε * _F_RT / ((b1 * np.sinh(b1))**2)
+    part1 = (b1 / b2) * np.sinh(2 * b1) / (b_diff * np.tanh(b2))
+    part2 = -np.cosh(2 * b1) / (2 * b_diff) - 1 / (2 * b2**2)
+    Z_direct = mf * (part1 + part2)
+
+    assert np.allclose(circuit_elements['TPn']([Rpore, Rct, Cdl, ε], freqs),
+                       Z_direct, rtol=1e-10, atol=0)
+
+
 def test_RC():
     freqs = [0.001, 1.0, 1000]
     circuit_1 = CustomCircuit('RC', initial_guess=[1, 1])
@@ -160,6 +254,25 @@ def test_d():
     answer = np.array([0, 0])
     assert np.isclose(d([a, b]), answer).all()
 
+    # element-wise subtraction of the last response from the first
+    c = np.array([1 + 1 * 1j, 4 - 2 * 1j])
+    answer = np.array([4 + 5 * 1j, -2 + 5 * 1j])
+    assert d([a, c]).shape == a.shape
+    assert np.isclose(d([a, c]), answer).all()
+
+
+def test_typeChecker():
+    freqs = [0.001, 1.0, 1000]
+    assert np.allclose(RC([1, 1], freqs), RC([1.0, 1.0], np.array(freqs)))
+
+    # boolean parameters and frequencies are not numbers
+    with pytest.raises(AssertionError):
+        RC([np.bool_(True), np.bool_(True)], freqs)
+    with pytest.raises(AssertionError):
+        RC([1, 1], [np.bool_(True)])
+    with pytest.raises(AssertionError):
+        RC([1, 1], np.array([True, False]))
+
 
 def test_element_function_names():
     # run a simple check to ensure there are no integers
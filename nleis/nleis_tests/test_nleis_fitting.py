@@ -5,9 +5,12 @@ from impedance.tests.test_preprocessing import frequencies \
 from impedance.tests.test_preprocessing import Z_correct
 from nleis.fitting import buildCircuit, \
     circuit_fit, mape, mae, extract_circuit_elements, \
-    set_default_bounds, seq_fit_param
+    set_default_bounds, seq_fit_param, evalCircuit
+from impedance.models.circuits.elements import circuit_elements
 from nleis.nleis_fitting import data_processing, \
-    simul_fit, individual_parameters
+    simul_fit, simul_fit_batch, individual_parameters, \
+    individual_parameters_index, wrapCircuit_simul, wrapJac_simul, \
+    wrapNeg_log_likelihood
 import os
 import pytest
 
@@ -315,6 +318,29 @@ def test_buildCircuit():
         'Wo([100,1],[1000.0,5.0,0.01])'
 
 
+def test_evalCircuit():
+
+    frequencies = np.array([1000.0, 5.0, 0.01])
+    cases = [('R0-d(p(R1, C1)-R2, C2)', [1, 2, 3, 4, 5], {}),
+             ('L0-R0-TDSn0', [1e-5, 0.01, 1, 0.1, 10, 1, 1000, 0.1], {
+                 'TDSn0_6': 0.1}),
+             ('R0-p(R1,C1)-p(R2-Wo1,C2)', [.01, .01, 100, .01, .05, 100],
+              {'Wo1_1': 1})]
+    for circuit, params, constants in cases:
+        Z = eval(buildCircuit(circuit, frequencies, *params,
+                              constants=constants)[0], circuit_elements)
+        # the compiled code is reused for the second evaluation
+        for i in range(2):
+            assert np.array_equal(evalCircuit(circuit, frequencies, params,
+                                              constants), Z)
+
+    # unhashable constants bypass the cache and reach the element checks
+    for graph in [False, True]:
+        with pytest.raises(AssertionError):
+            evalCircuit('R0-p(R1,C1)', frequencies, [1, 1e-3],
+                        {'R1': [2.0]}, graph)
+
+
 def test_mae():
     a = np.array([2 + 4*1j, 3 + 2*1j])
     b = np.array([2 + 4*1j, 3 + 2*1j])
@@ -405,6 +431,114 @@ def test_simul_fit():
                               param_norm=True, positive=True)
 
 
+def test_simul_fit_multistart():
+
+    frequencies = np.geomspace(1e-2, 1e4, 40)
+    p_true = [0.1, 1.0, 1e-3, 0.2]
+    Z1 = circuit_elements['R']([p_true[0]], frequencies) + \
+        circuit_elements['RC'](p_true[1:3], frequencies)
+    Z2 = circuit_elements['RCn'](p_true[1:4], frequencies)
+    initial_guess = [0.3, 0.3, 1e-2, 0]
+
+    args = (frequencies, Z1, Z2, 'R0-RC0', 'RCn0', 'R0-RCn0', initial_guess)
+    kwargs = dict(opt='neg', max_f=np.inf, positive=False)
+    p_single, _ = simul_fit(*args, **kwargs)
+    p_serial, _ = simul_fit(*args, n_starts=4, n_workers=1, **kwargs)
+    p_pool, _ = simul_fit(*args, n_starts=4, n_workers=2, **kwargs)
+
+    # the starting points do not depend on how they are dispatched
+    assert np.allclose(p_serial, p_pool)
+
+    # the best of the starts is kept, which includes the initial guess
+    nll = wrapNeg_log_likelihood(frequencies, Z1, Z2, 'R0-RCn0',
+                                 'R0-RC0', {}, 'RCn0', {},
+                                 np.ones(4), max_f=np.inf)
+    assert nll(p_serial) <= nll(p_single)
+
+
+def test_simul_fit_batch():
+
+    frequencies = np.geomspace(1e-2, 1e4, 40)
+    datasets = []
+    for R0 in [0.1, 0.2]:
+        p_true = [R0, 1.0, 1e-3, 0.2]
+        Z1 = circuit_elements['R']([p_true[0]], frequencies) + \
+            circuit_elements['RC'](p_true[1:3], frequencies)
+        Z2 = circuit_elements['RCn'](p_true[1:4], frequencies)
+        datasets.append((frequencies, Z1, Z2))
+    initial_guess = [0.3, 0.3, 1e-2, 0]
+
+    args = ('R0-RC0', 'RCn0', 'R0-RCn0', initial_guess)
+    kwargs = dict(max_f=np.inf, positive=False)
+    # the default fits the datasets in the current process
+    serial = simul_fit_batch(datasets, *args, **kwargs)
+    pool = simul_fit_batch(datasets, *args, n_workers=2, **kwargs)
+
+    # each dataset gets the same fit as a direct call to simul_fit
+    for dataset, (p_serial, perr_serial), (p_pool, perr_pool) in zip(
+            datasets, serial, pool):
+        p_values, p_errors = simul_fit(*dataset, *args, **kwargs)
+        assert np.allclose(p_serial, p_values)
+        assert np.allclose(perr_serial, p_errors)
+        assert np.allclose(p_pool, p_values)
+        assert np.allclose(perr_pool, p_errors)
+
+
+def test_wrapCircuit_simul():
+
+    frequencies = np.geomspace(1e-2, 1e4, 40)
+    model = wrapCircuit_simul('R0-RCn0', 'R0-RC0', {}, 'RCn0', {},
+                              np.ones(4), max_f=10)
+    p = [0.1, 1.0, 1e-3, 0.2]
+    assert len(model(frequencies, *p)) == 2*(40 + np.sum(frequencies < 10))
+
+    # frequencies changed in place select the 2nd-NLEIS frequencies again
+    frequencies *= 10
+    assert np.array_equal(
+        model(frequencies, *p),
+        wrapCircuit_simul('R0-RCn0', 'R0-RC0', {}, 'RCn0', {},
+                          np.ones(4), max_f=10)(frequencies, *p))
+
+
+def test_wrapJac_simul():
+
+    frequencies = np.loadtxt(os.path.join(data_dir, 'freq_30a.txt'))
+
+    circ_str_1 = 'L0-R0-TDS0-TDS1'
+    circ_str_2 = 'd(TDSn0,TDSn1)'
+    edited_circuit = 'L0-R0-TDSn0-TDSn1'
+
+    p0 = np.array([1e-7, 1e-2, 2.5e-2, 5e-3, 8.8, 8.7e-5, 3.6, 12, 0.09,
+                   2e-2, 1e-3, 0.8, 180, 3e9, 1, 6e-3])
+    bounds = set_default_bounds(edited_circuit)
+    ub = np.ones(len(p0))
+
+    model = wrapCircuit_simul(edited_circuit, circ_str_1, {},
+                              circ_str_2, {}, ub)
+    jac = wrapJac_simul(edited_circuit, circ_str_1, {},
+                        circ_str_2, {}, ub, bounds)
+
+    # forward differences re-evaluating both circuits for every parameter
+    y0 = model(frequencies, *p0)
+    J = np.empty((len(y0), len(p0)))
+    for i in range(len(p0)):
+        p = p0.copy()
+        p[i] += np.finfo(float).eps**0.5 * max(1, abs(p0[i]))
+        J[:, i] = (model(frequencies, *p) - y0) / (p[i] - p0[i])
+
+    assert np.array_equal(jac(frequencies, *p0), J)
+
+    # with the relative steps requested through diff_step
+    jac = wrapJac_simul(edited_circuit, circ_str_1, {},
+                        circ_str_2, {}, ub, bounds, diff_step=1e-6)
+    for i in range(len(p0)):
+        p = p0.copy()
+        p[i] += 1e-6 * abs(p0[i])
+        J[:, i] = (model(frequencies, *p) - y0) / (p[i] - p0[i])
+
+    assert np.array_equal(jac(frequencies, *p0), J)
+
+
 def test_individual_parameters():
 
     # EIS and 2nd-NLEIS circ_str are defined here to make sure
@@ -423,6 +557,7 @@ def test_individual_parameters():
     # Test without constant
     p1, p2 = individual_parameters(
         circ_str, initial_guess, constants_1={}, constants_2={})
+    assert isinstance(p1, list) and isinstance(p2, list)
     assert np.allclose(p1, [1e-7, 1e-3, 5e-3, 1e-3, 10.0,
                        1e-02, 100.0, 1e-3, 1e-03, 1e-03, 1e-02, 1000.0])
     assert np.allclose(p2, [5e-3, 1e-3, 10, 1e-2, 100,
@@ -503,3 +638,10 @@ def test_individual_parameters():
                        1e-02, 100.0, 1e-3, 1e-03, 1e-02, 1000.0])
 
     assert np.allclose(p2, [5e-3, 1e-3, 10, 1e-2, 100, 10])
+
+    # the same assignment as positions in the full parameter set
+    idx1, idx2 = individual_parameters_index(
+        circ_str, constants_1={'L0': 1e-7, 'TDS1_0': 0},
+        constants_2={'TDSn0_6': 0.1})
+    assert np.array_equal(idx1, [0, 1, 2, 3, 4, 5, 7, 8, 9, 10])
+    assert np.array_equal(idx2, [1, 2, 3, 4, 5, 6])